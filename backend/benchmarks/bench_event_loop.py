@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from controller.model import model_holder
+from controller.inference_pool import inference_pool
+
+DATASET_PATH = os.path.join(BACKEND_DIR, "dataset.csv")
+CONCURRENT_REQUESTS = 200
+ROWS_PER_REQUEST = 200
+TICK_SECONDS = 0.001
+
+
+async def heartbeat(lags, stop):
+    """Measure how late a 1 ms sleep wakes up, i.e. how long the loop was blocked"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(loop.time() - start - TICK_SECONDS)
+
+
+async def predict_inline(bundle, X):
+    return bundle.engine.predict_with_proba(X)
+
+
+async def predict_in_pool(bundle, X):
+    return await inference_pool.run(bundle.engine.predict_with_proba, X)
+
+
+async def run(predict, bundle, X):
+    lags = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[predict(bundle, X) for _ in range(CONCURRENT_REQUESTS)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await monitor
+    lags = np.array(lags) * 1000
+    return elapsed, np.percentile(lags, 50), np.percentile(lags, 99), lags.max()
+
+
+def main():
+    bundle = model_holder.get()
+    df = pd.read_csv(DATASET_PATH)
+    X, _ = bundle.preprocessor.transform_records(df.head(ROWS_PER_REQUEST).to_dict("records"))
+
+    print(f"{CONCURRENT_REQUESTS} concurrent predictions of {ROWS_PER_REQUEST} rows, "
+          f"{inference_pool.max_workers} inference workers")
+    print("=" * 72)
+    print(f"{'mode':<22}{'total s':>10}{'lag p50 ms':>14}{'lag p99 ms':>14}{'lag max ms':>12}")
+    for name, predict in (("inline on the loop", predict_inline), ("inference pool", predict_in_pool)):
+        elapsed, p50, p99, worst = asyncio.run(run(predict, bundle, X))
+        print(f"{name:<22}{elapsed:>10.2f}{p50:>14.2f}{p99:>14.2f}{worst:>12.2f}")
+
+    inference_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
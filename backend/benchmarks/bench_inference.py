@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from controller.model import model_holder
+
+DATASET_PATH = os.path.join(BACKEND_DIR, "dataset.csv")
+
+
+def time_call(fn, repeat):
+    """Return the median latency of fn() in microseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main():
+    bundle = model_holder.get()
+    model, engine = bundle.model, bundle.engine
+
+    df = pd.read_csv(DATASET_PATH)
+    X, _ = bundle.preprocessor.transform_records(df.to_dict("records"))
+    row = X[:1]
+    batch = X[:1000]
+
+    if not np.allclose(model.predict_proba(X), engine.predict_proba(X)):
+        print("Warning: compiled forest does not match sklearn predict_proba")
+
+    results = [
+        ("sklearn predict + predict_proba, 1 row", time_call(lambda: (model.predict(row), model.predict_proba(row)), 50)),
+        ("compiled predict_with_proba, 1 row", time_call(lambda: engine.predict_with_proba(row), 2000)),
+        ("sklearn predict + predict_proba, 1000 rows", time_call(lambda: (model.predict(batch), model.predict_proba(batch)), 20)),
+        ("compiled predict_with_proba, 1000 rows", time_call(lambda: engine.predict_with_proba(batch), 20)),
+    ]
+
+    print(f"Forest: {engine.n_trees} trees, {engine.n_nodes} nodes, max depth {engine.max_depth}")
+    print("=" * 60)
+    for name, micros in results:
+        print(f"{name:<45} {micros:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr, field_validator
-from database.mySql_connection import db, Session
+from database.mySql_connection import get_db
 from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from .user_directory import user_directory
 import bcrypt
 import re
 from typing import Optional
@@ -56,8 +58,10 @@ def is_valid_email(email):
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+# Plain def: bcrypt and MySQL calls block, so FastAPI runs these in its
+# threadpool and concurrent sign-ins use separate pooled connections
 @api.post('/signup', response_model=SignupResponse, status_code=201)
-async def signup(request: SignupRequest):
+def signup(request: SignupRequest, db: Connection = Depends(get_db)):
     """User registration endpoint"""
     try:
         first_name = request.firstName.strip()   
@@ -117,6 +121,7 @@ async def signup(request: SignupRequest):
             'gender': gender
         })
         db.commit()
+        user_directory.invalidate()
         
         return {
             'success': True,
@@ -137,7 +142,7 @@ async def signup(request: SignupRequest):
         )
 
 @api.post('/signin', response_model=SigninResponse, status_code=200)
-async def signin(request: SigninRequest):
+def signin(request: SigninRequest, db: Connection = Depends(get_db)):
     """User authentication endpoint"""
     try:
         email = request.email.strip()
@@ -161,7 +166,7 @@ async def signin(request: SigninRequest):
                 detail='Invalid email or password'
             )
         
-        expiry = datetime.now() + timedelta(minutes=int(os.getenv("expiry_time", 1440)))
+        expiry = datetime.now() + timedelta(minutes=int(os.getenv("expiry_time") or 1440))
         details = {
             "id": user.id,
             "email": user.email,
@@ -0,0 +1,148 @@
+import os
+import asyncio
+import numpy as np
+from .inference_pool import inference_pool
+
+# Collect concurrent single-row predictions for up to this many milliseconds...
+BATCH_WINDOW_MS = float(os.getenv("batch_window_ms") or 2)
+# ...or until this many rows are waiting, whichever comes first
+BATCH_MAX_SIZE = int(os.getenv("batch_max_size") or 64)
+
+
+class PredictionBatcher:
+    """
+    asyncio request coalescer in front of the model.
+
+    Concurrent /prediction/predict calls put their feature row on a queue; a
+    single worker task gathers the rows that arrive within `window_ms` (or
+    until `max_batch_size` rows are waiting), scores them with one vectorised
+    call on the inference pool and resolves each caller's future with its own
+    row of the result. A window of 0 scores whatever is already queued
+    without waiting.
+    """
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_batch_size=BATCH_MAX_SIZE):
+        self.window = max(window_ms, 0) / 1000
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self._queue = None
+        self._worker = None
+        self._scoring = set()
+        self._requests = 0
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._max_queue_depth = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def stop(self):
+        """
+        Cancel the worker task (called on server shutdown), then score the rows
+        still queued and wait for batches in flight, so no caller is left waiting
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for start in range(0, len(pending), self.max_batch_size):
+            await self._score(pending[start:start + self.max_batch_size])
+        if self._scoring:
+            await asyncio.gather(*self._scoring, return_exceptions=True)
+
+    async def predict(self, bundle, features):
+        """
+        Score one (1, n_features) row as part of the next batch.
+
+        Returns:
+            tuple: (predicted class, class probabilities) for this row
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((bundle, features, future))
+        self._requests += 1
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+
+        try:
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # stop() cancelled us mid-window: hand the rows back for it to score
+            for item in batch:
+                self._queue.put_nowait(item)
+            raise
+
+        return batch
+
+    async def _score(self, batch):
+        # A model swap can land mid-window, so score each bundle's rows separately
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[0]), []).append(item)
+
+        for items in groups.values():
+            bundle = items[0][0]
+            try:
+                X = np.vstack([features for _, features, _ in items])
+                predictions, probabilities = await inference_pool.run(bundle.engine.predict_with_proba, X)
+            except Exception as e:
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for i, (_, _, future) in enumerate(items):
+                if not future.done():
+                    future.set_result((predictions[i], probabilities[i]))
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            self._batches += 1
+            self._rows += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            # Keep collecting while this batch is scored; the pool bounds concurrency
+            task = asyncio.get_running_loop().create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    def stats(self):
+        """Queue depth and batch size counters"""
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch_size': self.max_batch_size,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue_depth': self._max_queue_depth,
+            'requests': self._requests,
+            'batches': self._batches,
+            'avg_batch_size': self._rows / self._batches if self._batches else 0.0,
+            'largest_batch': self._largest_batch,
+        }
+
+
+prediction_batcher = PredictionBatcher()
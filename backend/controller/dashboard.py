@@ -1,13 +1,55 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel
-from typing import List, Optional
-from .jwt_auth import verify_token
-from .stroke_data_service import get_all_stroke_predictions
-from database.mySql_connection import db
-from sqlalchemy import text
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal
+import os
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+from .jwt_auth import verify_token, verify_stream_ticket, issue_stream_ticket, STREAM_TICKET_SECONDS
+from .stroke_data_service import (
+    build_prediction_filter,
+    get_stroke_prediction_counts,
+    get_stroke_summary,
+    get_stroke_predictions_page,
+    get_stroke_predictions_by_ids,
+    get_stroke_prediction_by_id,
+    iter_stroke_predictions,
+    label_stroke_outcome
+)
+from .export_service import export_chunks, PARQUET_AVAILABLE
+from .trend_service import get_stroke_trends
+from .model import model_holder
+from .inference_pool import inference_pool
+from .explain import explain_documents
+from .user_directory import user_directory
+from .cache import TTLCache, canonical_key
+from .live_feed import live_feed, format_event, LIVE_FEED_HEARTBEAT
+from database.mySql_connection import get_connection, pool_busy
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 api = APIRouter(prefix='/dashboard', tags=['dashboard'])
 
+DASHBOARD_CACHE_SIZE = int(os.getenv("dashboard_cache_size") or 1000)
+DASHBOARD_CACHE_TTL = float(os.getenv("dashboard_cache_ttl") or 300)
+# Seconds the counters of a filtered search are reused, even as new predictions arrive
+DASHBOARD_COUNTS_TTL = float(os.getenv("dashboard_counts_ttl") or 30)
+
+# Range /trends covers when created_from is not given
+TREND_DEFAULT_RANGE = {'day': timedelta(days=30), 'week': timedelta(weeks=12), 'month': timedelta(days=365)}
+
+# /patients responses keyed on the summary version and query string; a new prediction moves the version
+dashboard_cache = TTLCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+# Filtered counters keyed on the filter alone, so paging through a search counts it once
+counts_cache = TTLCache(DASHBOARD_CACHE_SIZE, DASHBOARD_COUNTS_TTL)
+
+def parse_if_none_match(header):
+    """ETags listed in an If-None-Match header (weak validators compare equal)"""
+    if not header:
+        return set()
+    return {tag.strip().removeprefix('W/') for tag in header.split(',')}
+
 class PatientPrediction(BaseModel):
     prediction_id: str
     user_id: int
@@ -25,20 +67,76 @@ class DashboardResponse(BaseModel):
     moderate_risk_count: int
     low_risk_count: int
     predictions: List[PatientPrediction]
-    current_page: int
+    # Unknown when paging by cursor, since the cursor does not record its position
+    current_page: Optional[int] = None
     total_pages: int
     page_size: int
     has_next: bool
-    has_prev: bool
+    has_prev: Optional[bool] = None
+    next_cursor: Optional[str] = None
+
+class TrendPoint(BaseModel):
+    bucket_start: datetime
+    group: Optional[str] = None
+    count: int
+    high_risk_count: int
+    moderate_risk_count: int
+    low_risk_count: int
+    average_probability: float
+
+class TrendResponse(BaseModel):
+    success: bool
+    granularity: str
+    group_by: Optional[str] = None
+    created_from: datetime
+    created_to: datetime
+    points: List[TrendPoint]
+
+class OutcomeRequest(BaseModel):
+    stroke: int = Field(..., ge=0, le=1, description="Observed outcome: 1 if the patient had a stroke")
+
+class ExplanationBatchRequest(BaseModel):
+    prediction_ids: List[str] = Field(..., min_length=1, max_length=100, description="IDs of the predictions shown on a dashboard page")
+
+class ExplanationBatchItem(BaseModel):
+    prediction_id: str
+    model_version: Optional[str] = None
+    base_value: Optional[float] = None
+    probability: Optional[float] = None
+    contributions: List[dict] = []
+    error: Optional[str] = None
+
+class ExplanationBatchResponse(BaseModel):
+    success: bool
+    explanations: List[ExplanationBatchItem]
 
 @api.get('/patients', response_model=DashboardResponse)
-async def get_all_patients(
+def get_all_patients(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes precedence over page"),
+    risk_level: Optional[Literal['High', 'Moderate', 'Low']] = Query(None, description="Only predictions with this risk level"),
+    created_from: Optional[datetime] = Query(None, description="Only predictions made at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only predictions made before this time"),
+    age_min: Optional[float] = Query(None, ge=0, le=150, description="Minimum patient age"),
+    age_max: Optional[float] = Query(None, ge=0, le=150, description="Maximum patient age"),
+    gender: Optional[str] = Query(None, description="Patient gender: Male, Female, or Other"),
+    email: Optional[str] = Query(None, min_length=1, max_length=100, description="Email prefix (case-sensitive)"),
+    name: Optional[str] = Query(None, min_length=1, max_length=100, description="Patient name prefix"),
     token_payload: dict = Depends(verify_token)
 ):
     """
-    Get all patients and their stroke predictions with pagination (Doctor only)
+    Get all patients and their stroke predictions with pagination (Doctor only).
+    Filters apply to the whole collection and combine with page or cursor pagination
+    (with a cursor, current_page and has_prev are null);
+    the counters describe the filtered predictions and may lag by up to dashboard_counts_ttl seconds.
+    
+    Responses carry an ETag derived from the summary version, which moves on every
+    saved prediction; a matching If-None-Match gets an empty 304.
+    
+    A plain def, so FastAPI runs it in the threadpool: waiting for a pooled MySQL
+    connection or on MongoDB never blocks the event loop.
     """
     try:
         if token_payload.get("role") != 'doctor':
@@ -47,42 +145,62 @@ async def get_all_patients(
                 detail="Only doctors can access this endpoint"
             )
         
-        all_predictions_data = get_all_stroke_predictions(limit=10000)
+        summary = get_stroke_summary()
+        cache_key = canonical_key(summary.get('version', 0), sorted(request.query_params.multi_items()))
+        etag = f'"{cache_key[:32]}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache', 'Vary': 'Authorization'}
+        
+        if etag in parse_if_none_match(request.headers.get('if-none-match')):
+            return Response(status_code=304, headers=headers)
+        
+        cached = dashboard_cache.get(cache_key)
+        if cached is not None:
+            return JSONResponse(cached, headers=headers)
+        
+        user_ids = None
+        if name:
+            with get_connection() as db:
+                user_ids = user_directory.find_ids_by_name_prefix(db, name)
+        query = build_prediction_filter(
+            risk_level=risk_level,
+            created_from=created_from,
+            created_to=created_to,
+            age_min=age_min,
+            age_max=age_max,
+            gender=gender,
+            email_prefix=email,
+            user_ids=user_ids
+        )
+        
+        # Unfiltered totals are the materialized summary read above
+        if query:
+            counts_key = canonical_key(query)
+            summary = counts_cache.get(counts_key)
+            if summary is None:
+                summary = get_stroke_prediction_counts(query)
+                counts_cache.set(counts_key, summary)
+        
+        total_predictions = summary['total_predictions']
+        total_pages = (total_predictions + page_size - 1) // page_size  # Ceiling division
+        current_page = min(page, total_pages) if total_pages > 0 else 1
         
-        user_ids = list(set([pred.get('user_id') for pred in all_predictions_data if pred.get('user_id')]))
+        page_predictions, next_cursor = get_stroke_predictions_page(
+            page_size,
+            cursor=cursor,
+            skip=(current_page - 1) * page_size,
+            query=query
+        )
         
+        user_ids = [pred.get('user_id') for pred in page_predictions if pred.get('user_id')]
         user_names = {}
         if user_ids:
-            user_ids_tuple = tuple(user_ids)
-            if len(user_ids_tuple) == 1:
-                query = text("SELECT id, name, email FROM users WHERE id = :user_id")
-                users = db.execute(query, {'user_id': user_ids_tuple[0]}).fetchall()
-            else:
-                placeholders = ','.join([f':id{i}' for i in range(len(user_ids))])
-                query = text(f"SELECT id, name, email FROM users WHERE id IN ({placeholders})")
-                params = {f'id{i}': user_id for i, user_id in enumerate(user_ids)}
-                users = db.execute(query, params).fetchall()
-            
-            for user in users:
-                user_names[user.id] = user.name
-        
-        all_processed = []
-        high_risk = 0
-        moderate_risk = 0
-        low_risk = 0
-        
-        for pred in all_predictions_data:
+            with get_connection() as db:
+                user_names = user_directory.get_names(db, user_ids)
+        
+        paginated_predictions = []
+        for pred in page_predictions:
             user_id = pred.get('user_id')
-            risk_level = pred.get('prediction', {}).get('risk_level', 'Low')
-            
-            if risk_level == 'High':
-                high_risk += 1
-            elif risk_level == 'Moderate':
-                moderate_risk += 1
-            else:
-                low_risk += 1
-            
-            processed_pred = {
+            paginated_predictions.append({
                 'prediction_id': pred.get('_id'),
                 'user_id': user_id,
                 'user_email': pred.get('user_email', ''),
@@ -90,39 +208,266 @@ async def get_all_patients(
                 'input_data': pred.get('input_data', {}),
                 'prediction': pred.get('prediction', {}),
                 'created_at': pred.get('created_at').isoformat() if pred.get('created_at') else ''
-            }
-            all_processed.append(processed_pred)
-        
-        all_processed.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        total_predictions = len(all_processed)
-        total_pages = (total_predictions + page_size - 1) // page_size  # Ceiling division
-        current_page = min(page, total_pages) if total_pages > 0 else 1
-        
-        start_idx = (current_page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_predictions = all_processed[start_idx:end_idx]
+            })
         
-        return {
+        content = DashboardResponse(**{
             'success': True,
-            'total_patients': len(user_ids),
+            'total_patients': summary['total_patients'],
             'total_predictions': total_predictions,
-            'high_risk_count': high_risk,
-            'moderate_risk_count': moderate_risk,
-            'low_risk_count': low_risk,
+            'high_risk_count': summary['high_risk_count'],
+            'moderate_risk_count': summary['moderate_risk_count'],
+            'low_risk_count': summary['low_risk_count'],
             'predictions': paginated_predictions,
-            'current_page': current_page,
+            'current_page': current_page if cursor is None else None,
             'total_pages': total_pages,
             'page_size': page_size,
-            'has_next': current_page < total_pages,
-            'has_prev': current_page > 1
-        }
+            'has_next': next_cursor is not None,
+            'has_prev': current_page > 1 if cursor is None else None,
+            'next_cursor': next_cursor
+        }).model_dump(mode='json')
+        dashboard_cache.set(cache_key, content)
+        return JSONResponse(content, headers=headers)
     
     except HTTPException:
         raise
+    except PoolTimeoutError:
+        raise pool_busy()
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving patient data: {str(e)}"
         )
 
+@api.get('/trends', response_model=TrendResponse)
+def get_trends(
+    granularity: Literal['day', 'week', 'month'] = Query('day', description="Bucket size"),
+    created_from: Optional[datetime] = Query(None, description="Start of the range (defaults to 30 days, 12 weeks or 12 months back)"),
+    created_to: Optional[datetime] = Query(None, description="End of the range (defaults to now)"),
+    group_by: Optional[Literal['gender', 'age_band', 'work_type']] = Query(None, description="Split every bucket by this dimension"),
+    gender: Optional[str] = Query(None, description="Only this gender"),
+    age_band: Optional[str] = Query(None, description="Only this age band: 0-17, 18-39, 40-59, 60-79, 80+ or Unknown"),
+    work_type: Optional[str] = Query(None, description="Only this work type"),
+    token_payload: dict = Depends(verify_token)
+):
+    """
+    High/Moderate/Low counts and average probability per day, week or month (Doctor only).
+    Served from the stroke_trends rollups, so the cost depends on the number of buckets
+    in the range and not on the number of predictions. Buckets are UTC, weeks start on Monday.
+    """
+    try:
+        if token_payload.get("role") != 'doctor':
+            raise HTTPException(
+                status_code=403,
+                detail="Only doctors can access this endpoint"
+            )
+        
+        created_to = created_to or datetime.utcnow()
+        created_from = created_from or created_to - TREND_DEFAULT_RANGE[granularity]
+        if created_from >= created_to:
+            raise HTTPException(
+                status_code=400,
+                detail="created_from must be before created_to"
+            )
+        
+        filters = {
+            dimension: value
+            for dimension, value in (('gender', gender), ('age_band', age_band), ('work_type', work_type))
+            if value is not None
+        }
+        points = get_stroke_trends(granularity, created_from, created_to, group_by=group_by, filters=filters)
+        
+        return {
+            'success': True,
+            'granularity': granularity,
+            'group_by': group_by,
+            'created_from': created_from,
+            'created_to': created_to,
+            'points': points
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error retrieving trends: {str(e)}"
+        )
+
+@api.get('/export')
+def export_predictions(
+    format: Literal['csv', 'parquet'] = Query('csv', description="csv, or parquet with one row group per batch (needs pyarrow)"),
+    created_from: Optional[datetime] = Query(None, description="Only predictions made at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only predictions made before this time"),
+    after_id: Optional[str] = Query(None, description="Resume after this prediction_id (the last row already received)"),
+    batch_size: int = Query(2000, ge=100, le=10000, description="Documents per MongoDB batch"),
+    token_payload: dict = Depends(verify_token)
+):
+    """
+    Download every prediction, oldest first, as CSV or Parquet (Doctor only).
+    Rows are streamed from one MongoDB cursor, so memory does not grow with the export.
+    An interrupted CSV download resumes by passing the prediction_id of its last row as after_id;
+    the resumed response has no header line, so it can be appended to the partial file.
+    """
+    try:
+        if token_payload.get("role") != 'doctor':
+            raise HTTPException(
+                status_code=403,
+                detail="Only doctors can access this endpoint"
+            )
+        
+        if format == 'parquet' and not PARQUET_AVAILABLE:
+            raise HTTPException(
+                status_code=501,
+                detail="Parquet export requires pyarrow on the server"
+            )
+        
+        after = None
+        if after_id:
+            last = get_stroke_prediction_by_id(after_id)
+            after = (last['created_at'], last['_id'])
+        
+        batches = iter_stroke_predictions(
+            build_prediction_filter(created_from=created_from, created_to=created_to),
+            after=after,
+            batch_size=batch_size
+        )
+        # Run the query now, so a failure is still an HTTP error and not a truncated file
+        first = next(batches, None)
+        batches = itertools.chain([first] if first else [], batches)
+        
+        filename = f"stroke_predictions_{datetime.utcnow():%Y%m%d_%H%M%S}.{format}"
+        return StreamingResponse(
+            export_chunks(batches, format, header=after_id is None),
+            media_type='text/csv' if format == 'csv' else 'application/vnd.apache.parquet',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error exporting predictions: {str(e)}"
+        )
+
+@api.put('/predictions/{prediction_id}/outcome')
+def record_outcome(
+    prediction_id: str,
+    outcome: OutcomeRequest,
+    token_payload: dict = Depends(verify_token)
+):
+    """
+    Record the observed outcome of a prediction, used by retrain_model.py (Doctor only)
+    """
+    if token_payload.get("role") != 'doctor':
+        raise HTTPException(
+            status_code=403,
+            detail="Only doctors can access this endpoint"
+        )
+    
+    label_stroke_outcome(prediction_id, outcome.stroke, token_payload.get("id"))
+    return {'success': True, 'prediction_id': prediction_id, 'stroke': outcome.stroke}
+
+@api.post('/explanations', response_model=ExplanationBatchResponse)
+async def explain_predictions(
+    request: ExplanationBatchRequest,
+    token_payload: dict = Depends(verify_token)
+):
+    """
+    Feature contributions for every prediction on a dashboard page in one call (Doctor only)
+    """
+    try:
+        if token_payload.get("role") != 'doctor':
+            raise HTTPException(
+                status_code=403,
+                detail="Only doctors can access this endpoint"
+            )
+        
+        prediction_ids = list(dict.fromkeys(request.prediction_ids))
+        documents = await run_in_threadpool(get_stroke_predictions_by_ids, prediction_ids)
+        bundle = await inference_pool.run(model_holder.get)
+        explanations = await inference_pool.run(
+            explain_documents, bundle, [documents[prediction_id] for prediction_id in prediction_ids]
+        )
+        
+        return {'success': True, 'explanations': explanations}
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error explaining predictions: {str(e)}"
+        )
+
+async def live_events(request: Request, queue, backlog):
+    """Stream buffered then live events until the client leaves or is dropped for being slow"""
+    last_sent = 0
+    try:
+        # Browsers reconnect after this many milliseconds, sending Last-Event-ID
+        yield "retry: 3000\n\n"
+        for event in backlog:
+            last_sent = max(last_sent, event[0])
+            yield format_event(event)
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=LIVE_FEED_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            # An event published while subscribing can arrive both in the backlog and live
+            if event[0] <= last_sent:
+                continue
+            last_sent = event[0]
+            yield format_event(event)
+    finally:
+        live_feed.unsubscribe(queue)
+
+@api.post('/live/ticket')
+async def live_feed_ticket(token_payload: dict = Depends(verify_token)):
+    """
+    Short-lived ticket for opening /live (Doctor only). EventSource cannot send
+    an Authorization header, and the ticket keeps the session token out of the URL.
+    """
+    if token_payload.get("role") != 'doctor':
+        raise HTTPException(
+            status_code=403,
+            detail="Only doctors can access this endpoint"
+        )
+    
+    return {
+        'success': True,
+        'ticket': issue_stream_ticket(token_payload),
+        'expires_in': STREAM_TICKET_SECONDS
+    }
+
+@api.get('/live')
+async def live_feed_stream(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Resume after this event (the Last-Event-ID header also works)"),
+    token_payload: dict = Depends(verify_stream_ticket)
+):
+    """
+    Server-Sent Events stream of new predictions with the updated counters (Doctor only).
+    Events are pushed from memory, so open dashboards add no database load.
+    The ticket is only checked when the stream opens.
+    """
+    if token_payload.get("role") != 'doctor':
+        raise HTTPException(
+            status_code=403,
+            detail="Only doctors can access this endpoint"
+        )
+    
+    queue, backlog = live_feed.subscribe(request.headers.get('last-event-id') or last_event_id)
+    return StreamingResponse(
+        live_events(request, queue, backlog),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
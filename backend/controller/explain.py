@@ -0,0 +1,75 @@
+import os
+import numpy as np
+from .model import model_holder
+from .cache import TTLCache
+
+EXPLANATION_CACHE_SIZE = int(os.getenv("explanation_cache_size") or 5000)
+EXPLANATION_CACHE_TTL = float(os.getenv("explanation_cache_ttl") or 3600)
+
+# Explanations of stored predictions keyed on (prediction id, model version), emptied on model swap
+explanation_cache = TTLCache(EXPLANATION_CACHE_SIZE, EXPLANATION_CACHE_TTL)
+model_holder.add_swap_listener(lambda bundle: explanation_cache.clear())
+
+# Contributions are reported for the stroke (positive) class
+STROKE_CLASS_INDEX = 1
+
+
+def explain_records(bundle, records):
+    """
+    Feature contributions to the stroke probability for raw input records,
+    computed for all records in one pass over the forest.
+
+    Args:
+        bundle: ModelBundle to explain with
+        records: Input records in the StrokePredictionRequest format
+
+    Returns:
+        list: One explanation dict per record, or a dict with 'error' for records that cannot be scored
+    """
+    X, errors = bundle.preprocessor.transform_records(records)
+    valid = [i for i, error in enumerate(errors) if error is None]
+
+    explanations = [{'error': error} for error in errors]
+    if not valid:
+        return explanations
+
+    bias, contributions = bundle.engine.contributions(X[valid], class_index=STROKE_CLASS_INDEX)
+    columns = bundle.preprocessor.feature_columns
+    for position, i in enumerate(valid):
+        order = np.argsort(-np.abs(contributions[position]), kind='stable')
+        explanations[i] = {
+            'model_version': bundle.version,
+            'base_value': float(bias[position]),
+            'probability': float(bias[position] + contributions[position].sum()),
+            'contributions': [
+                {
+                    'feature': columns[j],
+                    'value': records[i].get(columns[j]),
+                    'contribution': float(contributions[position][j])
+                }
+                for j in order
+            ]
+        }
+    return explanations
+
+
+def explain_documents(bundle, documents):
+    """
+    Explanations for stored stroke_data documents, served from the cache where
+    possible. Uncached documents are explained together in one call.
+
+    Returns:
+        list: One explanation dict per document, each with its 'prediction_id'
+    """
+    explanations = [explanation_cache.get((doc['_id'], bundle.version)) for doc in documents]
+    missing = [i for i, explanation in enumerate(explanations) if explanation is None]
+
+    if missing:
+        computed = explain_records(bundle, [documents[i].get('input_data', {}) for i in missing])
+        for i, explanation in zip(missing, computed):
+            explanation = {'prediction_id': documents[i]['_id'], **explanation}
+            if 'error' not in explanation:
+                explanation_cache.set((documents[i]['_id'], bundle.version), explanation)
+            explanations[i] = explanation
+
+    return explanations
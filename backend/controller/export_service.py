@@ -0,0 +1,165 @@
+import io
+import csv
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ["csv", "parquet"]
+PARQUET_AVAILABLE = pq is not None
+
+# (column, Arrow type name) in export order; one flat row per stroke_data document
+EXPORT_COLUMNS = [
+    ("prediction_id", "string"),
+    ("user_id", "int64"),
+    ("user_email", "string"),
+    ("created_at", "timestamp"),
+    ("model_version", "string"),
+    ("gender", "string"),
+    ("age", "float64"),
+    ("hypertension", "int64"),
+    ("heart_disease", "int64"),
+    ("ever_married", "string"),
+    ("work_type", "string"),
+    ("Residence_type", "string"),
+    ("avg_glucose_level", "float64"),
+    ("bmi", "float64"),
+    ("smoking_status", "string"),
+    ("prediction", "int64"),
+    ("probability", "float64"),
+    ("risk_level", "string"),
+    ("outcome_stroke", "int64"),
+    ("outcome_labelled_at", "timestamp"),
+]
+EXPORT_FIELDS = [name for name, _ in EXPORT_COLUMNS]
+INPUT_FIELDS = EXPORT_FIELDS[5:15]
+
+def export_row(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one stroke_data document into the EXPORT_COLUMNS layout"""
+    input_data = document.get("input_data") or {}
+    prediction = document.get("prediction") or {}
+    outcome = document.get("outcome") or {}
+    row = {
+        "prediction_id": str(document.get("_id")),
+        "user_id": document.get("user_id"),
+        "user_email": document.get("user_email"),
+        "created_at": document.get("created_at"),
+        "model_version": document.get("model_version"),
+        "prediction": prediction.get("result"),
+        "probability": prediction.get("probability"),
+        "risk_level": prediction.get("risk_level"),
+        "outcome_stroke": outcome.get("stroke"),
+        "outcome_labelled_at": outcome.get("labelled_at"),
+    }
+    for field in INPUT_FIELDS:
+        row[field] = input_data.get(field)
+    return row
+
+def csv_text(documents: List[Dict[str, Any]], header: bool = False) -> str:
+    """CSV lines for a batch of documents (with the header line first if asked)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for document in documents:
+        row = export_row(document)
+        for field in ("created_at", "outcome_labelled_at"):
+            if isinstance(row[field], datetime):
+                row[field] = row[field].isoformat()
+        writer.writerow(row)
+    return buffer.getvalue()
+
+def parquet_schema():
+    """Arrow schema of EXPORT_COLUMNS (requires pyarrow)"""
+    types = {
+        "string": pa.string(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("ms"),
+    }
+    return pa.schema([(name, types[type_name]) for name, type_name in EXPORT_COLUMNS])
+
+def parquet_table(documents: List[Dict[str, Any]], schema=None):
+    """One Arrow table (written as one row group) for a batch of documents"""
+    schema = schema or parquet_schema()
+    rows = [export_row(document) for document in documents]
+    return pa.Table.from_pydict({name: [row[name] for row in rows] for name in EXPORT_FIELDS}, schema=schema)
+
+def parquet_writer(where, schema=None):
+    """ParquetWriter for EXPORT_COLUMNS to a path or file object"""
+    return pq.ParquetWriter(where, schema or parquet_schema(), compression="snappy")
+
+class ChunkSink:
+    """
+    Write-only file object that hands written bytes back in chunks, so a
+    ParquetWriter can be streamed to an HTTP response row group by row group
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self) -> bytes:
+        """Bytes written since the last drain"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def csv_chunks(batches: Iterable[List[Dict[str, Any]]], header: bool = True) -> Iterator[bytes]:
+    """Encoded CSV for a stream of document batches, header first unless header=False"""
+    if header:
+        yield csv_text([], header=True).encode()
+    for batch in batches:
+        yield csv_text(batch).encode()
+
+def parquet_chunks(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """
+    Parquet file bytes for a stream of document batches, one row group per
+    batch; only the current row group is held in memory
+    """
+    schema = parquet_schema()
+    sink = ChunkSink()
+    writer = parquet_writer(sink, schema)
+    try:
+        for batch in batches:
+            writer.write_table(parquet_table(batch, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    # The footer is written on close
+    yield sink.drain()
+
+def export_chunks(batches: Iterable[List[Dict[str, Any]]], export_format: str, header: bool = True) -> Iterator[bytes]:
+    """
+    Encoded export in the given format (one of EXPORT_FORMATS). header=False
+    leaves out the CSV header line, for appending to a resumed download
+    """
+    if export_format == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        return parquet_chunks(batches)
+    return csv_chunks(batches, header=header)
@@ -0,0 +1,102 @@
+import os
+import struct
+import hashlib
+import numpy as np
+
+from .tree_engine import CompiledForest
+
+# Compact, pickle-free binary format for a CompiledForest:
+#
+#   header   magic (8s) | format version | n_nodes | n_trees | n_classes | n_values | max_depth (6 x uint32)
+#            | sha256 of the payload (32s)
+#   payload  classes int64[n_classes] | roots int32[n_trees] | feature int16[n_nodes]
+#            | threshold float32[n_nodes] | left int32[n_nodes] | right int32[n_nodes]
+#            | value_index int32[n_nodes] | values float64[n_values, n_classes]
+#
+# Every section starts on an 8-byte boundary so it can be viewed straight out
+# of a memory map with np.frombuffer, without copying.
+MAGIC = b"STRKFRST"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8s6I32s")
+ALIGNMENT = 8
+
+
+def _sections(n_nodes, n_trees, n_classes, n_values):
+    return [
+        ("classes", np.int64, (n_classes,)),
+        ("roots", np.int32, (n_trees,)),
+        ("feature", np.int16, (n_nodes,)),
+        ("threshold", np.float32, (n_nodes,)),
+        ("left", np.int32, (n_nodes,)),
+        ("right", np.int32, (n_nodes,)),
+        ("value_index", np.int32, (n_nodes,)),
+        ("value", np.float64, (n_values, n_classes)),
+    ]
+
+
+def _padding(size):
+    return (-size) % ALIGNMENT
+
+
+def write_forest(engine, path):
+    """
+    Write a forest in the compact format (float32 thresholds, deduplicated
+    node values). The file is written next to `path` and renamed into place.
+
+    Returns:
+        dict: size in bytes and sha256 of the payload
+    """
+    if engine.value_index is None or engine.threshold.dtype != np.float32:
+        engine = engine.compact()
+
+    n_values, n_classes = engine.value.shape
+    payload = bytearray()
+    for name, dtype, _ in _sections(engine.n_nodes, engine.n_trees, n_classes, n_values):
+        data = np.ascontiguousarray(getattr(engine, name), dtype=dtype).tobytes()
+        payload += data + b"\0" * _padding(len(data))
+
+    checksum = hashlib.sha256(payload).digest()
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, engine.n_nodes, engine.n_trees, n_classes, n_values, engine.max_depth, checksum
+    )
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * _padding(HEADER.size))
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+    return {"bytes": os.path.getsize(path), "sha256": checksum.hex()}
+
+
+def read_forest(path, verify=True):
+    """
+    Memory-map a compact forest file and build a CompiledForest whose arrays
+    are views into the map (shared by every process that maps the file).
+    Raises ValueError if the file is not a forest file or fails the checksum.
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"{path} is not a compact forest file")
+
+    magic, version, n_nodes, n_trees, n_classes, n_values, max_depth, checksum = HEADER.unpack(
+        buffer[:HEADER.size].tobytes()
+    )
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a compact forest file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported forest format version {version} in {path}")
+
+    offset = HEADER.size + _padding(HEADER.size)
+    if verify and hashlib.sha256(buffer[offset:]).digest() != checksum:
+        raise ValueError(f"Checksum mismatch in {path}, the model file is corrupt")
+
+    arrays = {}
+    for name, dtype, shape in _sections(n_nodes, n_trees, n_classes, n_values):
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+        size = count * np.dtype(dtype).itemsize
+        offset += size + _padding(size)
+
+    return CompiledForest(max_depth=max_depth, **arrays)
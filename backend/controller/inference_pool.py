@@ -0,0 +1,68 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of threads that run model work; NumPy releases the GIL in the heavy array ops
+INFERENCE_WORKERS = int(os.getenv("inference_workers") or min(4, os.cpu_count() or 1))
+
+
+class InferencePool:
+    """
+    Dedicated, size-limited thread pool for CPU-bound model work.
+
+    Async endpoints await run() so preprocessing, scoring and model loading
+    never execute on the asyncio event loop; code that already runs in a
+    worker thread (streaming generators) uses run_sync() so the same limit
+    applies. Pending work is counted so the queue depth can be reported.
+    """
+
+    def __init__(self, max_workers=INFERENCE_WORKERS):
+        self.max_workers = max(int(max_workers), 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._max_pending = 0
+        self._completed = 0
+
+    def _enter(self):
+        with self._lock:
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+
+    def _exit(self):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool and await its result without blocking the loop"""
+        self._enter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._exit()
+
+    def run_sync(self, fn, *args):
+        """Run fn(*args) in the pool from a non-async thread and wait for the result"""
+        self._enter()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._exit()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Pool size and queue depth counters"""
+        return {
+            'workers': self.max_workers,
+            'queue_depth': max(self._pending - self.max_workers, 0),
+            'in_flight': self._pending,
+            'max_in_flight': self._max_pending,
+            'completed': self._completed,
+        }
+
+
+inference_pool = InferencePool()
@@ -1,16 +1,25 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 import os
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 load_dotenv()
 
 security = HTTPBearer()
 
+# Seconds a stream ticket can be used to open the /dashboard/live stream
+STREAM_TICKET_SECONDS = int(os.getenv("stream_ticket_seconds") or 60)
+STREAM_TICKET_SCOPE = "live"
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+    return decode_token(credentials.credentials)
+
+def verify_stream_ticket(ticket: str = Query(..., description="Stream ticket from POST /dashboard/live/ticket, for EventSource which cannot send headers")):
+    return decode_token(ticket, scope=STREAM_TICKET_SCOPE)
+
+def get_secret_key():
     secret_key = os.getenv("secret_key")
     
     if not secret_key:
@@ -19,9 +28,34 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             detail="Server configuration error"
         )
     
+    return secret_key
+
+def issue_stream_ticket(token_payload: dict):
+    """
+    Sign a short-lived ticket that only opens the live stream, so the session
+    JWT never ends up in a URL (and in proxy or access logs).
+    """
+    details = {
+        "id": token_payload.get("id"),
+        "role": token_payload.get("role"),
+        "scope": STREAM_TICKET_SCOPE,
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=STREAM_TICKET_SECONDS)
+    }
+    return jwt.encode(details, get_secret_key(), algorithm="HS256")
+
+def decode_token(token: str, scope: str = None):
+    secret_key = get_secret_key()
+    
     try:
         payload = jwt.decode(token, secret_key, algorithms=["HS256"])
         
+        # Session tokens carry no scope, so a stream ticket is refused everywhere else
+        if payload.get("scope") != scope:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
+            )
+        
         exp = payload.get("exp")
         if exp and datetime.fromtimestamp(exp) < datetime.now():
             raise HTTPException(
@@ -31,6 +65,8 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         
         return payload
         
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,150 @@
+import os
+import json
+import uuid
+import asyncio
+import threading
+from collections import deque
+
+LIVE_FEED_BUFFER_SIZE = int(os.getenv("live_feed_buffer_size") or 1000)
+LIVE_FEED_QUEUE_SIZE = int(os.getenv("live_feed_queue_size") or 100)
+# Rows sent per event; bigger saves (file uploads) only send their first rows plus the counters
+LIVE_FEED_MAX_ROWS = int(os.getenv("live_feed_max_rows") or 50)
+# Seconds between keep-alive comments on an idle stream
+LIVE_FEED_HEARTBEAT = float(os.getenv("live_feed_heartbeat") or 15)
+
+
+class BroadcastHub:
+    """
+    In-process fan-out of dashboard events to connected clients.
+
+    Every event gets an id "<epoch>-<n>" and is kept in a ring buffer, so a
+    client reconnecting with Last-Event-ID receives what it missed. Each
+    client has a bounded queue; a client too slow to keep up is disconnected
+    (its queue is replaced by an end-of-stream marker) and resumes from the
+    buffer when it reconnects, so one slow browser never holds up the others.
+    publish() may be called from any thread.
+    """
+
+    def __init__(self, buffer_size=LIVE_FEED_BUFFER_SIZE, queue_size=LIVE_FEED_QUEUE_SIZE):
+        self.queue_size = queue_size
+        # Ids from another process (or before a restart) can not be resumed
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self.published = 0
+        self.disconnected = 0
+
+    def publish(self, event_type, data):
+        """Buffer an event and hand it to every subscriber. Returns the event id."""
+        with self._lock:
+            self._counter += 1
+            self.published += 1
+            event = (self._counter, f"{self._epoch}-{self._counter}", event_type, json.dumps(data, default=str))
+            self._buffer.append(event)
+            loop = self._loop
+
+        if loop is not None and self._subscribers:
+            try:
+                loop.call_soon_threadsafe(self._fan_out, event)
+            except RuntimeError:
+                # Event loop already closed (server shutting down)
+                pass
+        return event[1]
+
+    def _fan_out(self, event):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.disconnected += 1
+                self._disconnect(queue)
+
+    def _disconnect(self, queue):
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def _backlog(self, last_event_id):
+        """Buffered events after last_event_id, or a reset event if they are no longer all buffered"""
+        if not last_event_id:
+            return []
+        epoch, _, number = last_event_id.partition("-")
+        if epoch != self._epoch or not number.isdigit() or int(number) > self._counter:
+            return [self.reset_event()]
+        last = int(number)
+        if self._buffer and self._buffer[0][0] > last + 1:
+            return [self.reset_event()]
+        return [event for event in self._buffer if event[0] > last]
+
+    @staticmethod
+    def reset_event():
+        """Tells the client to reload its view because events were missed"""
+        return (0, None, "reset", "{}")
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a client (must be called from the event loop).
+
+        Returns:
+            tuple: (queue of events, ending with None when the client is dropped; events to replay first)
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            backlog = self._backlog(last_event_id)
+            self._subscribers.add(queue)
+        return queue, backlog
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def close(self):
+        """End every open stream (server shutdown)"""
+        for queue in list(self._subscribers):
+            self._disconnect(queue)
+
+    def stats(self):
+        return {
+            'subscribers': len(self._subscribers),
+            'published': self.published,
+            'buffered': len(self._buffer),
+            'disconnected_slow_clients': self.disconnected,
+        }
+
+
+def format_event(event):
+    """Serialise an event in the Server-Sent Events wire format"""
+    _, event_id, event_type, data = event
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event_type}", f"data: {data}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def publish_predictions(documents, counters=None):
+    """
+    Announce newly saved stroke_data documents: the new rows (at most
+    LIVE_FEED_MAX_ROWS) and the dashboard counters after the save.
+    """
+    rows = [
+        {
+            'prediction_id': str(document.get('_id')),
+            'user_id': document.get('user_id'),
+            'user_email': document.get('user_email', ''),
+            'input_data': document.get('input_data', {}),
+            'prediction': document.get('prediction', {}),
+            'created_at': document['created_at'].isoformat() if document.get('created_at') else '',
+        }
+        for document in documents[:LIVE_FEED_MAX_ROWS]
+    ]
+    return live_feed.publish('predictions', {
+        'rows': rows,
+        'total_rows': len(documents),
+        'counters': counters,
+    })
+
+
+live_feed = BroadcastHub()
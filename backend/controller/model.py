@@ -1,5 +1,13 @@
 import os
+import time
+import hashlib
+import threading
+from functools import partial
 import joblib
+import numpy as np
+from .preprocess import PREPROCESSOR_PATH, load_preprocessor
+from .tree_engine import CompiledForest
+from .model_registry import REGISTRY_DIR, current_pointer_path, get_current_version, load_version, load_sklearn_model, match_feature_columns
 
 # controller/ folder
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -10,21 +18,195 @@ BACKEND_DIR = os.path.dirname(CURRENT_DIR)
 # stroke_model.pkl inside backend/
 MODEL_PATH = os.path.join(BACKEND_DIR, "stroke_model.pkl")
 
+# How often (seconds) the holder looks at the artifact on disk for changes
+MODEL_CHECK_INTERVAL = float(os.getenv("model_check_interval") or 5)
 
-def load_model():
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """Return the sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelBundle:
     """
-    Load the trained stroke model from stroke_model.pkl.
-    Raises FileNotFoundError if the file does not exist.
+    A servable model: the compiled array engine, the preprocessing it was
+    trained with and the version that produced it. The sklearn estimator is
+    only loaded when something asks for `model` (retraining, benchmarks).
+    """
+
+    def __init__(self, engine, preprocessor, version, metadata=None, model=None, model_loader=None):
+        self.engine = engine
+        self.preprocessor = preprocessor
+        self.version = version
+        self.metadata = metadata or {}
+        self._model = model
+        self._model_loader = model_loader
+
+    @property
+    def model(self):
+        if self._model is None and self._model_loader is not None:
+            self._model = self._model_loader()
+        return self._model
+
+    @classmethod
+    def from_sklearn(cls, model, preprocessor, version):
+        return cls(CompiledForest.from_sklearn(model), preprocessor, version, model=model)
+
+
+class ModelHolder:
+    """
+    Process-wide holder for the trained stroke model and its preprocessor.
+
+    When the model registry has a CURRENT version, that version is served from
+    memory-mapped arrays (shared across worker processes through the page
+    cache); otherwise stroke_model.pkl and preprocessor.pkl are loaded and
+    compiled in-process. The artifacts are loaded once (at server startup)
+    and shared by every request. get() looks at their mtime/size at most
+    every `check_interval` seconds; when a different version appears, the
+    new bundle is loaded and swapped in with a single reference assignment,
+    so requests already holding the old bundle finish with it and nothing
+    is dropped.
     """
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(
-            f"Model file not found at {MODEL_PATH}. Please train the model first."
+
+    def __init__(self, model_path=MODEL_PATH, preprocessor_path=PREPROCESSOR_PATH,
+                 registry_dir=REGISTRY_DIR, check_interval=MODEL_CHECK_INTERVAL):
+        self.model_path = model_path
+        self.preprocessor_path = preprocessor_path
+        self.registry_dir = registry_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._bundle = None
+        self._identity = None
+        self._stat = None
+        self._last_check = 0.0
+        self._swap_listeners = []
+
+    def add_swap_listener(self, callback):
+        """Register callback(bundle) to run whenever a new bundle is swapped in"""
+        self._swap_listeners.append(callback)
+
+    @property
+    def version(self):
+        """Version of the loaded model, or None if nothing is loaded."""
+        return self._bundle.version if self._bundle is not None else None
+
+    def _watched_paths(self):
+        pointer = current_pointer_path(self.registry_dir)
+        if os.path.exists(pointer):
+            return (pointer,)
+        return (self.model_path, self.preprocessor_path)
+
+    def _stat_signature(self):
+        signature = []
+        for path in self._watched_paths():
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load_registry_version(self, version):
+        engine, preprocessor, metadata = load_version(version, self.registry_dir)
+        return ModelBundle(
+            engine,
+            preprocessor,
+            version,
+            metadata=metadata,
+            model_loader=partial(load_sklearn_model, version, self.registry_dir),
         )
 
-    model = joblib.load(MODEL_PATH)
-    return model
+    def load(self):
+        """
+        Load the current model version and swap it in.
+        Raises FileNotFoundError if there is neither a registry version nor model files.
+        """
+        swapped = False
+        with self._lock:
+            registry_version = get_current_version(self.registry_dir)
+            if registry_version is None:
+                for path in (self.model_path, self.preprocessor_path):
+                    if not os.path.exists(path):
+                        raise FileNotFoundError(
+                            f"Model file not found at {path}. Please train the model first."
+                        )
+
+            signature = self._stat_signature()
+            if registry_version is not None:
+                identity = registry_version
+            else:
+                identity = hashlib.sha256(
+                    (file_checksum(self.model_path) + file_checksum(self.preprocessor_path)).encode()
+                ).hexdigest()
+
+            if identity != self._identity or self._bundle is None:
+                if registry_version is not None:
+                    bundle = self._load_registry_version(registry_version)
+                else:
+                    preprocessor = load_preprocessor(self.preprocessor_path)
+                    bundle = ModelBundle.from_sklearn(
+                        match_feature_columns(joblib.load(self.model_path), preprocessor.feature_columns),
+                        preprocessor,
+                        identity[:12],
+                    )
+                self._bundle = bundle
+                self._identity = identity
+                swapped = True
+                print(f"Loaded stroke model version {self.version}")
+            self._stat = signature
+            self._last_check = time.monotonic()
+
+        if swapped:
+            for callback in self._swap_listeners:
+                callback(self._bundle)
+
+        return self._bundle
+
+    def reload_if_changed(self):
+        """Reload the model if the artifact on disk has changed. Returns True on swap."""
+        try:
+            if self._stat_signature() == self._stat:
+                return False
+            previous = self._identity
+            self.load()
+            if self._identity != previous:
+                self.warm_up()
+                return True
+        except FileNotFoundError:
+            # Artifact removed or being replaced, keep serving the current model
+            pass
+        except Exception as e:
+            print(f"Warning: Failed to reload stroke model, keeping version {self.version}: {str(e)}")
+        return False
 
+    def get(self):
+        """Return the current ModelBundle, loading it on first use."""
+        if self._bundle is None:
+            return self.load()
 
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.reload_if_changed()
 
+        return self._bundle
 
+    def warm_up(self):
+        """Run one dummy inference so the first real request is not slow."""
+        bundle = self._bundle
+        if bundle is None:
+            return
+        dummy = np.zeros((1, bundle.preprocessor.n_features))
+        bundle.engine.predict_with_proba(dummy)
 
+
+model_holder = ModelHolder()
+
+
+def load_model():
+    """
+    Return the shared stroke model, loading stroke_model.pkl on first use.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    return model_holder.get().model
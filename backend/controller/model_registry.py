@@ -0,0 +1,177 @@
+import os
+import json
+import shutil
+import hashlib
+import joblib
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from .tree_engine import CompiledForest
+from .forest_format import write_forest, read_forest
+from .preprocess import FittedPreprocessor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.getenv("model_registry_dir") or os.path.join(BACKEND_DIR, "model_registry")
+
+# File in REGISTRY_DIR naming the version the server should load
+CURRENT_POINTER = "CURRENT"
+METADATA_FILE = "metadata.json"
+# The sklearn estimator, only unpickled by the retrain path (load_sklearn_model)
+MODEL_FILE = "model.joblib"
+# FittedPreprocessor statistics as JSON, so serving never unpickles anything
+PREPROCESSOR_FILE = "preprocessor.json"
+FOREST_FILE = "forest.bin"
+
+
+def match_feature_columns(model, feature_columns):
+    """
+    Check a fitted estimator against the preprocessor's column order.
+
+    Models fitted on a DataFrame remember its column names and sklearn then warns
+    on every NumPy row. The rows built by FittedPreprocessor are always in
+    feature_columns order, so once the names are checked they are dropped and
+    every estimator is handled the same way as one fitted on arrays.
+    Raises ValueError if the model was fitted on different columns.
+    """
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        return model
+    if list(names) != list(feature_columns):
+        raise ValueError(f"Model was fitted on columns {list(names)}, expected {list(feature_columns)}")
+    del model.feature_names_in_
+    return model
+
+
+def current_pointer_path(registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, CURRENT_POINTER)
+
+
+def version_dir(version: str, registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, version)
+
+
+def get_current_version(registry_dir: str = REGISTRY_DIR) -> Optional[str]:
+    """Return the published version the server should serve, or None if the registry is empty"""
+    try:
+        with open(current_pointer_path(registry_dir)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def set_current_version(version: str, registry_dir: str = REGISTRY_DIR) -> None:
+    """Atomically point CURRENT at a published version (running servers pick it up)"""
+    if not os.path.exists(os.path.join(version_dir(version, registry_dir), METADATA_FILE)):
+        raise FileNotFoundError(f"Model version {version} not found in {registry_dir}")
+    tmp_path = current_pointer_path(registry_dir) + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, current_pointer_path(registry_dir))
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> List[Dict[str, Any]]:
+    """Metadata of every published version, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(registry_dir)):
+        metadata_path = os.path.join(registry_dir, name, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                versions.append(json.load(f))
+    return versions
+
+
+def load_metadata(version: str, registry_dir: str = REGISTRY_DIR) -> Dict[str, Any]:
+    with open(os.path.join(version_dir(version, registry_dir), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def publish_model(
+    model,
+    preprocessor_artifact: Dict[str, Any],
+    metrics: Dict[str, Any],
+    training_data_hash: str,
+    registry_dir: str = REGISTRY_DIR,
+    make_current: bool = True
+) -> str:
+    """
+    Publish a trained model as a new immutable registry version
+
+    Args:
+        model: Fitted RandomForestClassifier
+        preprocessor_artifact: Fitted preprocessing returned by fit_preprocessor()
+        metrics: Evaluation metrics of the model
+        training_data_hash: sha256 of the data the model was trained on
+        registry_dir: Registry root directory
+        make_current: Point CURRENT at the new version
+
+    Returns:
+        str: The new version id
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+
+    match_feature_columns(model, preprocessor_artifact["feature_columns"])
+    engine = CompiledForest.from_sklearn(model)
+    created_at = datetime.utcnow()
+    fingerprint = hashlib.sha256(engine.threshold.tobytes() + engine.value.tobytes()).hexdigest()
+    version = f"{created_at.strftime('%Y%m%d%H%M%S')}-{fingerprint[:8]}"
+
+    # Build the version in a temporary directory and rename it into place
+    target = version_dir(version, registry_dir)
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    joblib.dump(model, os.path.join(staging, MODEL_FILE))
+    with open(os.path.join(staging, PREPROCESSOR_FILE), "w") as f:
+        json.dump(FittedPreprocessor.from_artifact(preprocessor_artifact).to_dict(), f)
+    artifact = write_forest(engine, os.path.join(staging, FOREST_FILE))
+
+    metadata = {
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "metrics": metrics,
+        "feature_columns": list(preprocessor_artifact["feature_columns"]),
+        "training_data_hash": training_data_hash,
+        "n_trees": engine.n_trees,
+        "n_nodes": engine.n_nodes,
+        "max_depth": engine.max_depth,
+        "artifact": {"file": FOREST_FILE, **artifact},
+        "params": {key: value for key, value in model.get_params().items() if isinstance(value, (int, float, str, bool, type(None)))},
+    }
+    with open(os.path.join(staging, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    os.replace(staging, target)
+
+    if make_current:
+        set_current_version(version, registry_dir)
+
+    return version
+
+
+def load_version(version: str, registry_dir: str = REGISTRY_DIR):
+    """
+    Load a published version for serving (forest.bin and preprocessor.json, nothing is unpickled)
+
+    Returns:
+        tuple: (CompiledForest backed by memory-mapped arrays, FittedPreprocessor, metadata)
+    """
+    directory = version_dir(version, registry_dir)
+    metadata = load_metadata(version, registry_dir)
+    engine = read_forest(os.path.join(directory, FOREST_FILE))
+    if engine.max_depth != metadata["max_depth"]:
+        raise ValueError(f"Model version {version} does not match its metadata")
+    with open(os.path.join(directory, PREPROCESSOR_FILE)) as f:
+        preprocessor = FittedPreprocessor.from_dict(json.load(f))
+    if preprocessor.feature_columns != metadata["feature_columns"]:
+        raise ValueError(f"Model version {version} has inconsistent feature order")
+    return engine, preprocessor, metadata
+
+
+def load_sklearn_model(version: str, registry_dir: str = REGISTRY_DIR):
+    """Load the original sklearn estimator of a version (for retraining and benchmarks)"""
+    model = joblib.load(os.path.join(version_dir(version, registry_dir), MODEL_FILE))
+    return match_feature_columns(model, load_metadata(version, registry_dir)["feature_columns"])
@@ -1,16 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel, Field
-from typing import Optional
-import pandas as pd
-import numpy as np
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any
+from datetime import datetime
 import os
-import joblib
-from .preprocess import preprocess_data
+import io
+import csv
+import json
+import numpy as np
+import pandas as pd
+from .model import model_holder
+from .batching import prediction_batcher
+from .inference_pool import inference_pool
+from .cache import TTLCache, canonical_key
+from .preprocess import FEATURE_COLUMNS, CATEGORICAL_COLUMNS
 from .jwt_auth import verify_token
-from .stroke_data_service import save_stroke_prediction
+from .explain import explain_records, explain_documents
+from .stroke_data_service import (
+    save_stroke_prediction,
+    save_stroke_predictions,
+    build_stroke_document,
+    get_stroke_prediction_by_id,
+    get_stroke_predictions_page,
+    get_stroke_prediction_trend
+)
 
 api = APIRouter(prefix='/prediction', tags=['prediction'])
 
+MAX_BATCH_SIZE = int(os.getenv("max_batch_size") or 1000)
+SCORE_CHUNK_ROWS = int(os.getenv("score_chunk_rows") or 5000)
+PREDICTION_CACHE_SIZE = int(os.getenv("prediction_cache_size") or 10000)
+PREDICTION_CACHE_TTL = float(os.getenv("prediction_cache_ttl") or 3600)
+
+# Results of /predict keyed on the normalised input and model version, emptied on model swap
+prediction_cache = TTLCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+model_holder.add_swap_listener(lambda bundle: prediction_cache.clear())
+
+# Fields of a stored prediction shown in the patient's history
+HISTORY_PROJECTION = {
+    "prediction": 1,
+    "model_version": 1,
+    "input_data.age": 1,
+    "input_data.bmi": 1,
+    "input_data.avg_glucose_level": 1
+}
+
+SCORED_FILE_COLUMNS = ['row', 'id', 'prediction', 'probability', 'risk_level', 'error']
+
+# Bounds of the numeric StrokePredictionRequest fields, checked column-wise on uploaded files
+FILE_NUMERIC_RANGES = {
+    'age': (0, 150),
+    'hypertension': (0, 1),
+    'heart_disease': (0, 1),
+    'avg_glucose_level': (0, None),
+    'bmi': (0, 100),
+}
+FILE_INTEGER_COLUMNS = ['hypertension', 'heart_disease']
+FILE_OPTIONAL_COLUMNS = ['bmi']
+
 class StrokePredictionRequest(BaseModel):
     gender: str = Field(..., description="Gender: Male, Female, or Other")
     age: float = Field(..., ge=0, le=150, description="Age in years")
@@ -29,17 +77,83 @@ class StrokePredictionResponse(BaseModel):
     probability: float
     risk_level: str
     message: str
+    model_version: Optional[str] = None
+
+class StrokePredictionBatchRequest(BaseModel):
+    # Records are validated one by one so a single bad row does not fail the batch
+    records: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Patient records in the StrokePredictionRequest format")
+
+class BatchPredictionResult(BaseModel):
+    index: int
+    success: bool
+    prediction: Optional[int] = None
+    probability: Optional[float] = None
+    risk_level: Optional[str] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
 
-def load_model():
-    """Load the trained model with joblib (same as train_model.py)"""
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    model_path = os.path.join(backend_dir, 'stroke_model.pkl')
+class StrokePredictionBatchResponse(BaseModel):
+    success: bool
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchPredictionResult]
+
+class FeatureContribution(BaseModel):
+    feature: str
+    value: Any = None
+    contribution: float
+
+class ExplanationResponse(BaseModel):
+    success: bool
+    prediction_id: Optional[str] = None
+    model_version: Optional[str] = None
+    base_value: float
+    probability: float
+    contributions: List[FeatureContribution]
+
+class HistoryItem(BaseModel):
+    prediction_id: str
+    created_at: datetime
+    prediction: int
+    probability: float
+    risk_level: str
+    model_version: Optional[str] = None
+    age: Optional[float] = None
+    bmi: Optional[float] = None
+    avg_glucose_level: Optional[float] = None
+
+class HistoryTrend(BaseModel):
+    count: int
+    latest: float
+    latest_risk_level: Optional[str] = None
+    latest_at: datetime
+    min: float
+    max: float
+    average: float
+    moving_average: float
+    window: int
+
+class HistoryResponse(BaseModel):
+    success: bool
+    predictions: List[HistoryItem]
+    next_cursor: Optional[str] = None
+    trend: Optional[HistoryTrend] = None
 
-    if not os.path.exists(model_path):
-        raise FileNotFoundError("Model file not found. Please train the model first.")
+def get_risk_level(probability):
+    """Map a stroke probability to its risk level and message"""
+    if probability < 0.3:
+        return "Low", "Low risk of stroke based on the provided data."
+    elif probability < 0.6:
+        return "Moderate", "Moderate risk of stroke. Consider lifestyle changes and regular check-ups."
+    else:
+        return "High", "High risk of stroke. Please consult with a healthcare professional."
 
-    model = joblib.load(model_path)
-    return model
+def format_validation_error(error):
+    """Flatten a pydantic ValidationError into one readable line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
 
 @api.post('/predict', response_model=StrokePredictionResponse)
 async def predict_stroke( request: StrokePredictionRequest, token_payload: dict = Depends(verify_token)):
@@ -47,67 +161,34 @@ async def predict_stroke( request: StrokePredictionRequest, token_payload: dict
         if token_payload.get("role") != 'patient':
             raise HTTPException(status_code=400, detail = "You are not authorized to use this endpoint because you are not a patient")
         
-        print(token_payload)
-
-        model = load_model()
-
-        input_dict = {
-            'id': [0],
-            'gender': [request.gender],
-            'age': [request.age],
-            'hypertension': [request.hypertension],
-            'heart_disease': [request.heart_disease],
-            'ever_married': [request.ever_married],
-            'work_type': [request.work_type],
-            'Residence_type': [request.Residence_type],
-            'avg_glucose_level': [request.avg_glucose_level],
-            'bmi': [request.bmi if request.bmi is not None else np.nan],
-            'smoking_status': [request.smoking_status],
-            'stroke': [0] 
-        }
-        
-        df = pd.DataFrame(input_dict)
-        preprocessed_df = preprocess_data(df)
-        
-        X_preprocessed = preprocessed_df.drop('stroke', axis=1)
-        
-        prediction = model.predict(X_preprocessed)[0]
-        probability = model.predict_proba(X_preprocessed)[0][1]
-        
-        if probability < 0.3:
-            risk_level = "Low"
-            message = "Low risk of stroke based on the provided data."
-        elif probability < 0.6:
-            risk_level = "Moderate"
-            message = "Moderate risk of stroke. Consider lifestyle changes and regular check-ups."
+        bundle = await inference_pool.run(model_holder.get)
+        input_data = request.model_dump()
+
+        cache_key = canonical_key(bundle.version, input_data)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            prediction, probability = cached
         else:
-            risk_level = "High"
-            message = "High risk of stroke. Please consult with a healthcare professional."
+            features = bundle.preprocessor.transform_request(input_data)
+            prediction, probabilities = await prediction_batcher.predict(bundle, features)
+            probability = probabilities[1]
+            prediction_cache.set(cache_key, (prediction, probability))
+        
+        risk_level, message = get_risk_level(probability)
         
         try:
             user_id = token_payload.get("id")
             user_email = token_payload.get("email", "")
             
-            input_data = {
-                "gender": request.gender,
-                "age": request.age,
-                "hypertension": request.hypertension,
-                "heart_disease": request.heart_disease,
-                "ever_married": request.ever_married,
-                "work_type": request.work_type,
-                "Residence_type": request.Residence_type,
-                "avg_glucose_level": request.avg_glucose_level,
-                "bmi": request.bmi,
-                "smoking_status": request.smoking_status
-            }
-            
-            save_stroke_prediction(
+            await run_in_threadpool(
+                save_stroke_prediction,
                 user_id=user_id,
                 user_email=user_email,
                 input_data=input_data,
                 prediction=int(prediction),
                 probability=float(probability),
-                risk_level=risk_level
+                risk_level=risk_level,
+                model_version=bundle.version
             )
         except Exception as e:
             print(f"Warning: Failed to save stroke prediction to MongoDB: {str(e)}")
@@ -117,11 +198,358 @@ async def predict_stroke( request: StrokePredictionRequest, token_payload: dict
             'prediction': int(prediction),
             'probability': float(probability),
             'risk_level': risk_level,
-            'message': message
+            'message': message,
+            'model_version': bundle.version
         }
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+
+@api.post('/predict-batch', response_model=StrokePredictionBatchResponse)
+async def predict_stroke_batch(request: StrokePredictionBatchRequest, token_payload: dict = Depends(verify_token)):
+    """
+    Score a list of patient records with one model call (patients and doctors).
+    Results come back in input order; invalid records get an error instead of failing the batch.
+    """
+    try:
+        if token_payload.get("role") not in ('patient', 'doctor'):
+            raise HTTPException(status_code=403, detail="You are not authorized to use this endpoint")
+        
+        bundle = await inference_pool.run(model_holder.get)
+        
+        results = [None] * len(request.records)
+        valid_indices = []
+        valid_records = []
+        
+        for index, record in enumerate(request.records):
+            try:
+                valid_records.append(StrokePredictionRequest.model_validate(record).model_dump())
+                valid_indices.append(index)
+            except ValidationError as e:
+                results[index] = {'index': index, 'success': False, 'error': format_validation_error(e)}
+        
+        documents = []
+        if valid_records:
+            features, errors = await inference_pool.run(bundle.preprocessor.transform_records, valid_records)
+            scored = [i for i, error in enumerate(errors) if error is None]
+            for i, error in enumerate(errors):
+                if error is not None:
+                    index = valid_indices[i]
+                    results[index] = {'index': index, 'success': False, 'error': error}
+            
+            if scored:
+                predictions, probabilities = await inference_pool.run(bundle.engine.predict_with_proba, features[scored])
+                
+                user_id = token_payload.get("id")
+                user_email = token_payload.get("email", "")
+                
+                for position, i in enumerate(scored):
+                    index = valid_indices[i]
+                    probability = float(probabilities[position][1])
+                    risk_level, message = get_risk_level(probability)
+                    results[index] = {
+                        'index': index,
+                        'success': True,
+                        'prediction': int(predictions[position]),
+                        'probability': probability,
+                        'risk_level': risk_level,
+                        'message': message
+                    }
+                    documents.append(build_stroke_document(
+                        user_id=user_id,
+                        user_email=user_email,
+                        input_data=valid_records[i],
+                        prediction=int(predictions[position]),
+                        probability=probability,
+                        risk_level=risk_level,
+                        model_version=bundle.version
+                    ))
+        
+        try:
+            await run_in_threadpool(save_stroke_predictions, documents)
+        except Exception as e:
+            print(f"Warning: Failed to save stroke predictions to MongoDB: {str(e)}")
+        
+        succeeded = len(documents)
+        return {
+            'success': succeeded > 0,
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        }
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@api.post('/explain', response_model=ExplanationResponse)
+async def explain_stroke(request: StrokePredictionRequest, token_payload: dict = Depends(verify_token)):
+    """
+    Per-feature contributions to the stroke probability of a new input (patients and doctors).
+    Contributions are sorted by size and add up to probability - base_value.
+    """
+    try:
+        if token_payload.get("role") not in ('patient', 'doctor'):
+            raise HTTPException(status_code=403, detail="You are not authorized to use this endpoint")
+        
+        bundle = await inference_pool.run(model_holder.get)
+        explanation = (await inference_pool.run(explain_records, bundle, [request.model_dump()]))[0]
+        if 'error' in explanation:
+            raise HTTPException(status_code=400, detail=explanation['error'])
+        
+        return {'success': True, **explanation}
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=f"Explanation error: {str(e)}")
+
+@api.get('/explain/{prediction_id}', response_model=ExplanationResponse)
+async def explain_stored_prediction(prediction_id: str, token_payload: dict = Depends(verify_token)):
+    """
+    Per-feature contributions for a stored prediction under the current model version.
+    Patients can only explain their own predictions; doctors can explain any.
+    """
+    try:
+        role = token_payload.get("role")
+        if role not in ('patient', 'doctor'):
+            raise HTTPException(status_code=403, detail="You are not authorized to use this endpoint")
+        
+        document = await run_in_threadpool(get_stroke_prediction_by_id, prediction_id)
+        if role == 'patient' and document.get('user_id') != token_payload.get("id"):
+            raise HTTPException(status_code=404, detail=f"Prediction not found: {prediction_id}")
+        
+        bundle = await inference_pool.run(model_holder.get)
+        explanation = (await inference_pool.run(explain_documents, bundle, [document]))[0]
+        if 'error' in explanation:
+            raise HTTPException(status_code=400, detail=explanation['error'])
+        
+        return {'success': True, **explanation}
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=f"Explanation error: {str(e)}")
+
+@api.get('/history', response_model=HistoryResponse)
+async def prediction_history(
+    page_size: int = Query(10, ge=1, le=100, description="Number of predictions per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    window: int = Query(5, ge=2, le=50, description="Predictions in the moving average"),
+    token_payload: dict = Depends(verify_token)
+):
+    """
+    The authenticated patient's past predictions, newest first, with keyset pagination.
+    The first page (no cursor) also carries a trend summary of the probability.
+    """
+    try:
+        if token_payload.get("role") != 'patient':
+            raise HTTPException(status_code=403, detail="Only patients have a prediction history")
+        
+        user_id = token_payload.get("id")
+        documents, next_cursor = await run_in_threadpool(
+            get_stroke_predictions_page,
+            page_size,
+            cursor=cursor,
+            query={"user_id": user_id},
+            projection=HISTORY_PROJECTION
+        )
+        trend = await run_in_threadpool(get_stroke_prediction_trend, user_id, window) if cursor is None else None
+        
+        predictions = []
+        for document in documents:
+            prediction = document.get('prediction', {})
+            input_data = document.get('input_data', {})
+            predictions.append({
+                'prediction_id': document['_id'],
+                'created_at': document['created_at'],
+                'prediction': prediction.get('result'),
+                'probability': prediction.get('probability'),
+                'risk_level': prediction.get('risk_level'),
+                'model_version': document.get('model_version'),
+                'age': input_data.get('age'),
+                'bmi': input_data.get('bmi'),
+                'avg_glucose_level': input_data.get('avg_glucose_level')
+            })
+        
+        return {'success': True, 'predictions': predictions, 'next_cursor': next_cursor, 'trend': trend}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=f"Error retrieving prediction history: {str(e)}")
+
+def read_upload_chunks(upload, input_format, chunk_rows):
+    """Read an uploaded CSV or NDJSON file in the dataset.csv layout as DataFrame chunks"""
+    if input_format == 'ndjson':
+        return pd.read_json(upload.file, lines=True, chunksize=chunk_rows, dtype=False)
+    return pd.read_csv(
+        upload.file,
+        chunksize=chunk_rows,
+        dtype={col: str for col in CATEGORICAL_COLUMNS},
+        na_values=['N/A']
+    )
+
+def validate_chunk(chunk):
+    """
+    Apply the StrokePredictionRequest range checks to a DataFrame chunk, one
+    vectorised comparison per column. Messages follow format_validation_error().
+    
+    Returns:
+        list: per row, None for valid rows, otherwise the first failed check
+    """
+    errors = [None] * len(chunk)
+    for col, (lower, upper) in FILE_NUMERIC_RANGES.items():
+        # Values that are not numbers at all are reported by transform_columns
+        values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+        checks = []
+        if col not in FILE_OPTIONAL_COLUMNS:
+            checks.append((np.isnan(values), "Field required"))
+        if col in FILE_INTEGER_COLUMNS:
+            checks.append((values % 1 != 0, "Input should be a valid integer"))
+        if lower is not None:
+            checks.append((values < lower, f"Input should be greater than or equal to {lower}"))
+        if upper is not None:
+            checks.append((values > upper, f"Input should be less than or equal to {upper}"))
+        for failed, message in checks:
+            for row in np.flatnonzero(failed):
+                errors[row] = errors[row] or f"{col}: {message}"
+    return errors
+
+def score_chunk(bundle, chunk):
+    """
+    Transform, validate and score one DataFrame chunk. Rows failing the
+    /predict validation are reported and never scored.
+    
+    Returns:
+        tuple: (errors, predictions, probabilities of the positive class) per row
+    """
+    features, errors = bundle.preprocessor.transform_columns(
+        {col: chunk[col].to_numpy() for col in FEATURE_COLUMNS}
+    )
+    errors = [error or invalid for error, invalid in zip(errors, validate_chunk(chunk))]
+    scored = [i for i, error in enumerate(errors) if error is None]
+    probabilities = np.zeros(len(errors))
+    predictions = np.zeros(len(errors), dtype=int)
+    if scored:
+        chunk_predictions, proba = bundle.engine.predict_with_proba(features[scored])
+        probabilities[scored] = proba[:, 1]
+        predictions[scored] = chunk_predictions
+    return errors, predictions, probabilities
+
+def score_chunks(first_chunk, chunks, bundle, output_format, persist, token_payload):
+    """
+    Score DataFrame chunks one vectorised model call at a time and
+    yield the scored rows as NDJSON lines or CSV text, so memory stays flat.
+    """
+    user_id = token_payload.get("id")
+    user_email = token_payload.get("email", "")
+    row_offset = 0
+    
+    if output_format == 'csv':
+        yield ','.join(SCORED_FILE_COLUMNS) + '\n'
+    
+    chunk = first_chunk
+    while chunk is not None:
+        errors, predictions, probabilities = inference_pool.run_sync(score_chunk, bundle, chunk)
+        
+        ids = chunk['id'].tolist() if 'id' in chunk.columns else [None] * len(errors)
+        if persist:
+            inputs = chunk[FEATURE_COLUMNS].astype(object)
+            records = inputs.where(inputs.notna(), None).to_dict('records')
+        documents = []
+        rows = []
+        for i, error in enumerate(errors):
+            row = {'row': row_offset + i, 'id': ids[i], 'prediction': None, 'probability': None, 'risk_level': None, 'error': error}
+            if error is None:
+                probability = float(probabilities[i])
+                risk_level, _ = get_risk_level(probability)
+                row.update({'prediction': int(predictions[i]), 'probability': probability, 'risk_level': risk_level})
+                if persist:
+                    documents.append(build_stroke_document(
+                        user_id=user_id,
+                        user_email=user_email,
+                        input_data=records[i],
+                        prediction=row['prediction'],
+                        probability=probability,
+                        risk_level=risk_level,
+                        model_version=bundle.version
+                    ))
+            rows.append(row)
+        
+        if documents:
+            try:
+                save_stroke_predictions(documents)
+            except Exception as e:
+                print(f"Warning: Failed to save stroke predictions to MongoDB: {str(e)}")
+        
+        if output_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=SCORED_FILE_COLUMNS)
+            writer.writerows(rows)
+            yield buffer.getvalue()
+        else:
+            yield ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+        
+        row_offset += len(rows)
+        chunk = next(chunks, None)
+
+@api.post('/predict-file')
+async def predict_stroke_file(
+    file: UploadFile = File(..., description="CSV or NDJSON file in the dataset.csv column layout"),
+    output_format: str = Query('ndjson', pattern='^(ndjson|csv)$', description="Format of the streamed results"),
+    persist: bool = Query(False, description="Also save scored rows to MongoDB"),
+    token_payload: dict = Depends(verify_token)
+):
+    """
+    Score a whole CSV/NDJSON upload in fixed-size chunks and stream the results back.
+    Rows are validated like /predict input; rows that fail or cannot be scored are
+    returned with an error instead of failing the file, and are never persisted.
+    """
+    try:
+        if token_payload.get("role") not in ('patient', 'doctor'):
+            raise HTTPException(status_code=403, detail="You are not authorized to use this endpoint")
+        
+        bundle = await inference_pool.run(model_holder.get)
+        
+        filename = (file.filename or '').lower()
+        is_ndjson = filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (file.content_type or '')
+        chunks = iter(read_upload_chunks(file, 'ndjson' if is_ndjson else 'csv', SCORE_CHUNK_ROWS))
+        
+        # Read the first chunk up front so layout problems become a 400, not a broken stream
+        first_chunk = await run_in_threadpool(next, chunks, None)
+        if first_chunk is None:
+            raise HTTPException(status_code=400, detail="Uploaded file contains no rows")
+        missing = [col for col in FEATURE_COLUMNS if col not in first_chunk.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+        
+        media_type = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+        return StreamingResponse(
+            score_chunks(first_chunk, chunks, bundle, output_format, persist, token_payload),
+            media_type=media_type
+        )
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read uploaded file: {str(e)}")
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
@@ -1,48 +1,254 @@
 import pandas as pd
 import numpy as np
 import os
-import pickle
+import joblib
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.impute import SimpleImputer
 
-def preprocess_data(df):
-    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    dataset_path = os.path.join(backend_dir, 'dataset.csv')
-    
-    # df = pd.read_csv(dataset_path)
-    print(type(df))
-    
-    X = df.drop(['id', 'stroke'], axis=1)
-    y = df['stroke']
-    
-    if 'bmi' in X.columns:
-        X['bmi'] = X['bmi'].replace('N/A', np.nan)
-        X['bmi'] = pd.to_numeric(X['bmi'], errors='coerce')
-    
-    categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-    
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREPROCESSOR_PATH = os.path.join(BACKEND_DIR, 'preprocessor.pkl')
+
+# Column layout of dataset.csv without 'id' and 'stroke', in the order the model was trained on
+FEATURE_COLUMNS = [
+    'gender',
+    'age',
+    'hypertension',
+    'heart_disease',
+    'ever_married',
+    'work_type',
+    'Residence_type',
+    'avg_glucose_level',
+    'bmi',
+    'smoking_status',
+]
+CATEGORICAL_COLUMNS = ['gender', 'ever_married', 'work_type', 'Residence_type', 'smoking_status']
+
+# Explicit dtypes for dataset.csv so pandas does not have to infer them (bmi uses 'N/A' for missing)
+DATASET_DTYPES = {
+    'id': np.int64,
+    'age': np.float64,
+    'hypertension': np.int8,
+    'heart_disease': np.int8,
+    'avg_glucose_level': np.float64,
+    'bmi': np.float64,
+    'stroke': np.int8,
+    **{col: str for col in CATEGORICAL_COLUMNS},
+}
+
+# pyarrow is in requirements.txt; the C parser is only a fallback for installs without it
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+
+class FittedPreprocessor:
+    """
+    Transform-only version of the training preprocessing.
+
+    Holds the label-encoder classes, imputer means and scaler statistics that
+    were fitted in train_model.py, and applies them to request data as plain
+    NumPy arrays (no DataFrame, no refitting, no file I/O).
+    """
+
+    def __init__(self, feature_columns, categories, statistics, mean, scale):
+        self.feature_columns = list(feature_columns)
+        self.categories = {col: [str(v) for v in classes] for col, classes in categories.items()}
+        self._codes = {
+            col: {value: code for code, value in enumerate(classes)}
+            for col, classes in self.categories.items()
+        }
+        self.statistics = np.asarray(statistics, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    @property
+    def n_features(self):
+        return len(self.feature_columns)
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Build from the dict saved by save_preprocessor()"""
+        return cls(
+            feature_columns=artifact['feature_columns'],
+            categories={col: le.classes_ for col, le in artifact['label_encoders'].items()},
+            statistics=artifact['imputer'].statistics_,
+            mean=artifact['scaler'].mean_,
+            scale=artifact['scaler'].scale_,
+        )
+
+    def to_dict(self):
+        """JSON-serialisable statistics, read back with from_dict() without unpickling anything"""
+        return {
+            'feature_columns': self.feature_columns,
+            'categories': self.categories,
+            'statistics': self.statistics.tolist(),
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from the dict returned by to_dict()"""
+        return cls(**data)
+
+    def _encode(self, col, value):
+        code = self._codes[col].get(str(value))
+        if code is None:
+            raise ValueError(
+                f"Unknown value '{value}' for {col}. Expected one of: {', '.join(self.categories[col])}"
+            )
+        return code
+
+    def _finish(self, X):
+        # Impute missing values with the training means, then standardise
+        X = np.where(np.isnan(X), self.statistics, X)
+        return (X - self.mean) / self.scale
+
+    def transform_request(self, values):
+        """
+        Map one record (dict of raw feature values) to a (1, n_features) row.
+        Raises ValueError for unknown categories or non-numeric values.
+        """
+        row = np.empty(self.n_features, dtype=np.float64)
+        for i, col in enumerate(self.feature_columns):
+            value = values.get(col)
+            if col in self._codes:
+                row[i] = self._encode(col, value)
+            elif value is None or value == 'N/A':
+                row[i] = np.nan
+            else:
+                row[i] = float(value)
+        return self._finish(row).reshape(1, -1)
+
+    def transform_columns(self, columns):
+        """
+        Map column-oriented data (dict of column -> sequence) to an
+        (n_rows, n_features) matrix in one vectorised pass.
+
+        Returns:
+            tuple: (X, errors) where errors[i] is None for usable rows, otherwise
+            the reason row i was rejected (its row in X must not be used)
+        """
+        missing = [col for col in self.feature_columns if col not in columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        n_rows = len(columns[self.feature_columns[0]])
+        X = np.empty((n_rows, self.n_features), dtype=np.float64)
+        errors = [None] * n_rows
+
+        for i, col in enumerate(self.feature_columns):
+            values = columns[col]
+            if col in self._codes:
+                classes = np.asarray(self.categories[col])
+                values = np.asarray(values).astype(str)
+                codes = np.minimum(np.searchsorted(classes, values), len(classes) - 1)
+                bad = classes[codes] != values
+                X[:, i] = codes
+                for row in np.flatnonzero(bad):
+                    errors[row] = errors[row] or (
+                        f"Unknown value '{values[row]}' for {col}. "
+                        f"Expected one of: {', '.join(self.categories[col])}"
+                    )
+            else:
+                try:
+                    X[:, i] = np.asarray(values, dtype=np.float64)
+                except (TypeError, ValueError):
+                    for row, value in enumerate(values):
+                        try:
+                            X[row, i] = np.nan if value is None or value == 'N/A' else float(value)
+                        except (TypeError, ValueError):
+                            X[row, i] = np.nan
+                            errors[row] = errors[row] or f"Invalid value '{value}' for {col}"
+
+        return self._finish(X), errors
+
+    def transform_records(self, records):
+        """Vectorised transform of a list of record dicts, see transform_columns()"""
+        columns = {col: [record.get(col) for record in records] for col in self.feature_columns}
+        return self.transform_columns(columns)
+
+
+def load_preprocessor(path=PREPROCESSOR_PATH):
+    """
+    Load the fitted preprocessing saved next to the model.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Preprocessor file not found at {path}. Please train the model first."
+        )
+    return FittedPreprocessor.from_artifact(joblib.load(path))
+
+
+def save_preprocessor(artifact, path=PREPROCESSOR_PATH):
+    """Save the fitted encoders, imputer and scaler returned by fit_preprocessor()"""
+    joblib.dump(artifact, path)
+    return path
+
+
+def read_dataset(path):
+    """Read dataset.csv with explicit dtypes (multi-threaded pyarrow parser when installed)"""
+    return pd.read_csv(path, dtype=DATASET_DTYPES, na_values=['N/A'], engine=CSV_ENGINE)
+
+
+def fit_preprocessor(df):
+    """
+    Fit the label encoders, mean imputer and scaler on a dataset.csv frame.
+
+    Returns:
+        dict: feature_columns, label_encoders, imputer and scaler
+    """
+    X = df[FEATURE_COLUMNS].copy()
+
+    X['bmi'] = X['bmi'].replace('N/A', np.nan)
+    X['bmi'] = pd.to_numeric(X['bmi'], errors='coerce')
+
     label_encoders = {}
-    for col in categorical_cols:
+    for col in CATEGORICAL_COLUMNS:
         le = LabelEncoder()
         X[col] = le.fit_transform(X[col].astype(str))
         label_encoders[col] = le
-    
+
     X = X.apply(pd.to_numeric, errors='coerce')
-    
+
     imputer = SimpleImputer(strategy='mean')
     X_imputed = imputer.fit_transform(X)
-    X = pd.DataFrame(X_imputed, columns=X.columns)
-        
+
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    
-    preprocessed_df = pd.concat([X_scaled, y], axis=1)
-        
-    processed_data_dir = backend_dir
-    preprocessed_path = os.path.join(processed_data_dir, 'preprocessed_data.csv')
-    
-    preprocessed_df.to_csv(preprocessed_path, index=False)
-
-    return preprocessed_df
+    scaler.fit(X_imputed)
+
+    return {
+        'feature_columns': list(FEATURE_COLUMNS),
+        'label_encoders': label_encoders,
+        'imputer': imputer,
+        'scaler': scaler,
+    }
+
+
+def preprocess_data(df, artifact=None):
+    """
+    Preprocess a dataset.csv frame for training, entirely in memory.
+    Fits a new preprocessor unless an already fitted `artifact` is given.
+
+    Returns:
+        tuple: (X, y) as float64 feature matrix and int target array
+    """
+    if artifact is None:
+        artifact = fit_preprocessor(df)
+
+    X = df[FEATURE_COLUMNS].copy()
+
+    X['bmi'] = X['bmi'].replace('N/A', np.nan)
+    X['bmi'] = pd.to_numeric(X['bmi'], errors='coerce')
+
+    for col, le in artifact['label_encoders'].items():
+        X[col] = le.transform(X[col].astype(str))
+
+    X = X.apply(pd.to_numeric, errors='coerce')
+    X_imputed = artifact['imputer'].transform(X)
+    X_scaled = artifact['scaler'].transform(X_imputed)
 
+    return np.ascontiguousarray(X_scaled), df['stroke'].to_numpy(dtype=np.int64)
@@ -1,15 +1,78 @@
+import re
+import json
+import base64
 from datetime import datetime
-from typing import Optional, Dict, Any
-from database.mongodb_connection import stroke_collection
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from database.mongodb_connection import stroke_collection, summary_collection, patients_collection
+from .live_feed import publish_predictions
+from .trend_service import update_trend_rollups
 from fastapi import HTTPException
 
+# _id of the single document in stroke_summary
+SUMMARY_ID = "dashboard"
+SUMMARY_COUNTERS = ["total_predictions", "total_patients", "high_risk_count", "moderate_risk_count", "low_risk_count"]
+
+def build_stroke_document(
+    user_id: int,
+    user_email: str,
+    input_data: Dict[str, Any],
+    prediction: int,
+    probability: float,
+    risk_level: str,
+    model_version: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build the stroke_data document stored for one prediction
+    
+    Args:
+        user_id: User ID from token
+        user_email: User email from token
+        input_data: Input data used for prediction
+        prediction: Prediction result (0 or 1)
+        probability: Prediction probability
+        risk_level: Risk level (Low, Moderate, High)
+        model_version: Version of the model that produced the prediction
+    
+    Returns:
+        dict: Document ready to insert
+    """
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "user_email": user_email,
+        "input_data": {
+            "gender": input_data.get("gender"),
+            "age": input_data.get("age"),
+            "hypertension": input_data.get("hypertension"),
+            "heart_disease": input_data.get("heart_disease"),
+            "ever_married": input_data.get("ever_married"),
+            "work_type": input_data.get("work_type"),
+            "Residence_type": input_data.get("Residence_type"),
+            "avg_glucose_level": input_data.get("avg_glucose_level"),
+            "bmi": input_data.get("bmi"),
+            "smoking_status": input_data.get("smoking_status")
+        },
+        "prediction": {
+            "result": prediction,
+            "probability": probability,
+            "risk_level": risk_level
+        },
+        "model_version": model_version,
+        "created_at": now,
+        "updated_at": now
+    }
+
 def save_stroke_prediction(
     user_id: int,
     user_email: str,
     input_data: Dict[str, Any],
     prediction: int,
     probability: float,
-    risk_level: str
+    risk_level: str,
+    model_version: Optional[str] = None
 ) -> str:
     """
     Save stroke prediction data to MongoDB
@@ -21,6 +84,7 @@ def save_stroke_prediction(
         prediction: Prediction result (0 or 1)
         probability: Prediction probability
         risk_level: Risk level (Low, Moderate, High)
+        model_version: Version of the model that produced the prediction
     
     Returns:
         str: ID of the inserted document
@@ -32,31 +96,13 @@ def save_stroke_prediction(
         )
     
     try:
-        stroke_document = {
-            "user_id": user_id,
-            "user_email": user_email,
-            "input_data": {
-                "gender": input_data.get("gender"),
-                "age": input_data.get("age"),
-                "hypertension": input_data.get("hypertension"),
-                "heart_disease": input_data.get("heart_disease"),
-                "ever_married": input_data.get("ever_married"),
-                "work_type": input_data.get("work_type"),
-                "Residence_type": input_data.get("Residence_type"),
-                "avg_glucose_level": input_data.get("avg_glucose_level"),
-                "bmi": input_data.get("bmi"),
-                "smoking_status": input_data.get("smoking_status")
-            },
-            "prediction": {
-                "result": prediction,
-                "probability": probability,
-                "risk_level": risk_level
-            },
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        stroke_document = build_stroke_document(
+            user_id, user_email, input_data, prediction, probability, risk_level, model_version
+        )
         
         result = stroke_collection.insert_one(stroke_document)
+        update_trend_rollups([stroke_document])
+        announce_predictions([stroke_document], update_stroke_summary([stroke_document]))
         return str(result.inserted_id)
     
     except Exception as e:
@@ -65,6 +111,37 @@ def save_stroke_prediction(
             detail=f"Failed to save stroke prediction data: {str(e)}"
         )
 
+def save_stroke_predictions(documents: List[Dict[str, Any]]) -> List[str]:
+    """
+    Bulk-save stroke prediction documents to MongoDB in one round trip
+    
+    Args:
+        documents: Documents built with build_stroke_document
+    
+    Returns:
+        list: IDs of the inserted documents, in input order
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    if not documents:
+        return []
+    
+    try:
+        result = stroke_collection.insert_many(documents, ordered=False)
+        update_trend_rollups(documents)
+        announce_predictions(documents, update_stroke_summary(documents))
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save stroke prediction data: {str(e)}"
+        )
+
 def get_stroke_predictions_by_user(user_id: int, limit: int = 100) -> list:
     """
     Get stroke predictions for a specific user
@@ -132,5 +209,566 @@ def get_all_stroke_predictions(limit: int = 100) -> list:
             detail=f"Failed to retrieve stroke predictions: {str(e)}"
         )
 
+def encode_cursor(document: Dict[str, Any]) -> str:
+    """Opaque page token pointing just after `document` in (created_at, _id) order"""
+    payload = json.dumps({"created_at": document["created_at"].isoformat(), "id": str(document["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_cursor; raises a 400 for tokens it did not produce"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["created_at"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def build_prediction_filter(
+    risk_level: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    age_min: Optional[float] = None,
+    age_max: Optional[float] = None,
+    gender: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    user_ids: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Build the MongoDB filter for the dashboard search. Every condition has an
+    index to start from; MongoDB picks one per query and checks the other
+    conditions on the documents it fetches
+    
+    Args:
+        risk_level: High, Moderate or Low
+        created_from: Earliest created_at (inclusive)
+        created_to: Latest created_at (exclusive)
+        age_min: Minimum age in the prediction input (inclusive)
+        age_max: Maximum age in the prediction input (inclusive)
+        gender: Gender in the prediction input
+        email_prefix: Start of the user email (case-sensitive, so it stays an index range)
+        user_ids: Only predictions of these users (e.g. from a name search)
+    
+    Returns:
+        dict: MongoDB filter, empty when no condition is given
+    """
+    query = {}
+    if risk_level is not None:
+        query["prediction.risk_level"] = risk_level
+    if created_from is not None or created_to is not None:
+        query["created_at"] = {}
+        if created_from is not None:
+            query["created_at"]["$gte"] = created_from
+        if created_to is not None:
+            query["created_at"]["$lt"] = created_to
+    if age_min is not None or age_max is not None:
+        query["input_data.age"] = {}
+        if age_min is not None:
+            query["input_data.age"]["$gte"] = age_min
+        if age_max is not None:
+            query["input_data.age"]["$lte"] = age_max
+    if gender is not None:
+        query["input_data.gender"] = gender
+    if email_prefix:
+        query["user_email"] = {"$regex": "^" + re.escape(email_prefix)}
+    if user_ids is not None:
+        query["user_id"] = {"$in": list(user_ids)}
+    return query
+
+def get_stroke_predictions_page(
+    page_size: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    query: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Get one page of stroke predictions, newest first, sorted and sliced in MongoDB
+    
+    Args:
+        page_size: Number of documents to return
+        cursor: Token from a previous page (keyset pagination on created_at, _id)
+        skip: Documents to skip when no cursor is given (page/page_size access)
+        query: Filter from build_prediction_filter
+        projection: Fields to return (created_at is always included for the cursor)
+    
+    Returns:
+        tuple: (documents, cursor for the next page or None on the last page)
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    query = query or {}
+    if projection is not None:
+        projection = {**projection, "created_at": 1}
+    if cursor is not None:
+        created_at, last_id = decode_cursor(cursor)
+        after_cursor = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}}
+        ]}
+        query = {"$and": [query, after_cursor]} if query else after_cursor
+        skip = 0
+    
+    try:
+        # One extra document tells us whether there is a next page
+        documents = list(
+            stroke_collection.find(query, projection)
+            .sort([("created_at", -1), ("_id", -1)])
+            .skip(skip)
+            .limit(page_size + 1)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve stroke predictions: {str(e)}"
+        )
+    
+    next_cursor = encode_cursor(documents[page_size - 1]) if len(documents) > page_size else None
+    documents = documents[:page_size]
+    for pred in documents:
+        pred["_id"] = str(pred["_id"])
+    
+    return documents, next_cursor
+
+def get_stroke_prediction_trend(user_id: int, window: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    Summary of one user's predicted probabilities, computed in MongoDB with a
+    single $facet over the user_id_created_at_id index (newest first)
+    
+    Args:
+        user_id: User ID
+        window: Number of most recent predictions in the moving average
+    
+    Returns:
+        dict: count, latest, min, max, average and moving_average of the probability,
+        or None if the user has no predictions
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    probability = "$prediction.probability"
+    try:
+        result = next(stroke_collection.aggregate([
+            {"$match": {"user_id": user_id}},
+            {"$sort": {"created_at": -1, "_id": -1}},
+            {"$project": {"_id": 0, "created_at": 1, "prediction.probability": 1, "prediction.risk_level": 1}},
+            # Facets see the documents in index order, so none of them sorts again
+            {"$facet": {
+                "overall": [{"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "min": {"$min": probability},
+                    "max": {"$max": probability},
+                    "average": {"$avg": probability}
+                }}],
+                "latest": [{"$limit": 1}],
+                "recent": [
+                    {"$limit": window},
+                    {"$group": {"_id": None, "moving_average": {"$avg": probability}}}
+                ]
+            }}
+        ]), None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve prediction trend: {str(e)}"
+        )
+    
+    if not result or not result["latest"]:
+        return None
+    overall = result["overall"][0]
+    latest = result["latest"][0]
+    return {
+        "count": overall["count"],
+        "latest": latest["prediction"]["probability"],
+        "latest_risk_level": latest["prediction"].get("risk_level"),
+        "latest_at": latest["created_at"],
+        "min": overall["min"],
+        "max": overall["max"],
+        "average": overall["average"],
+        "moving_average": result["recent"][0]["moving_average"],
+        "window": window
+    }
+
+def get_stroke_prediction_counts(query: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Count the predictions matching a filter, their distinct patients and risk levels in one aggregation.
+    Every matching document is read, so the cost grows with the match; callers cache the result
+    
+    Args:
+        query: Filter from build_prediction_filter
+    
+    Returns:
+        dict: The same counters as the stroke summary, for the filtered predictions
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    try:
+        result = next(stroke_collection.aggregate([
+            {"$match": query},
+            {"$facet": {
+                "risk": [{"$group": {"_id": "$prediction.risk_level", "count": {"$sum": 1}}}],
+                "patients": [
+                    {"$match": {"user_id": {"$ne": None}}},
+                    {"$group": {"_id": "$user_id"}},
+                    {"$count": "count"}
+                ]
+            }}
+        ]), None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to count stroke predictions: {str(e)}"
+        )
+    
+    # $facet answers with one document even when nothing matches; treat a missing one the same way
+    result = result or {"risk": [], "patients": []}
+    risk_counts = {row["_id"]: row["count"] for row in result["risk"]}
+    total = sum(risk_counts.values())
+    high = risk_counts.get("High", 0)
+    moderate = risk_counts.get("Moderate", 0)
+    return {
+        "total_predictions": total,
+        "total_patients": result["patients"][0]["count"] if result["patients"] else 0,
+        "high_risk_count": high,
+        "moderate_risk_count": moderate,
+        "low_risk_count": total - high - moderate
+    }
+
+def update_stroke_summary(documents: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Add newly inserted documents to the materialized dashboard counters with
+    one $inc. Patients are counted the first time their user_id is upserted
+    into stroke_patients. Does nothing until the summary has been built
+    (get_stroke_summary builds it on first read).
+    
+    The patient upserts and the $inc are separate writes, not one transaction:
+    a failure between them, or a rebuild_stroke_summary() running at the same
+    time (its totals can miss documents saved while it counts), leaves the
+    counters slightly off. They are not self-correcting, so rebuild_summary.py
+    should be run periodically (e.g. nightly) to bring them back in line.
+    
+    Args:
+        documents: Documents that were just inserted into stroke_data
+    
+    Returns:
+        dict: The summary after the update, or None if it was not updated
+    """
+    if summary_collection is None or not documents:
+        return None
+    
+    try:
+        now = datetime.utcnow()
+        increments = {counter: 0 for counter in SUMMARY_COUNTERS}
+        increments["total_predictions"] = len(documents)
+        for document in documents:
+            risk_level = document.get("prediction", {}).get("risk_level")
+            if risk_level == "High":
+                increments["high_risk_count"] += 1
+            elif risk_level == "Moderate":
+                increments["moderate_risk_count"] += 1
+            else:
+                increments["low_risk_count"] += 1
+        
+        # Saves come from one user's request, so this is normally a single upsert
+        user_ids = {document.get("user_id") for document in documents if document.get("user_id") is not None}
+        for user_id in user_ids:
+            result = patients_collection.update_one(
+                {"_id": user_id},
+                {"$setOnInsert": {"first_seen": now}},
+                upsert=True
+            )
+            if result.upserted_id is not None:
+                increments["total_patients"] += 1
+        
+        increments["version"] = 1
+        return summary_collection.find_one_and_update(
+            {"_id": SUMMARY_ID},
+            {"$inc": increments, "$set": {"updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        # The prediction is saved; the counters can be rebuilt with rebuild_stroke_summary()
+        print(f"Warning: Failed to update stroke summary: {str(e)}")
+        return None
+
+def announce_predictions(documents: List[Dict[str, Any]], summary: Optional[Dict[str, Any]]) -> None:
+    """
+    Push saved documents and the updated counters to connected dashboards
+    
+    Args:
+        documents: Documents that were just inserted into stroke_data
+        summary: Summary returned by update_stroke_summary
+    """
+    counters = {counter: summary[counter] for counter in SUMMARY_COUNTERS} if summary else None
+    try:
+        publish_predictions(documents, counters)
+    except Exception as e:
+        print(f"Warning: Failed to publish predictions to the live feed: {str(e)}")
+
+def rebuild_stroke_summary() -> Dict[str, Any]:
+    """
+    Recompute the dashboard counters and the distinct patients from stroke_data
+    with aggregation pipelines, and store them as the summary document
+    
+    Returns:
+        dict: The rebuilt summary
+    """
+    if stroke_collection is None or summary_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    try:
+        stroke_collection.aggregate([
+            {"$match": {"user_id": {"$ne": None}}},
+            {"$group": {"_id": "$user_id", "first_seen": {"$min": "$created_at"}}},
+            {"$out": patients_collection.name}
+        ])
+        
+        risk_counts = {
+            row["_id"]: row["count"]
+            for row in stroke_collection.aggregate([
+                {"$group": {"_id": "$prediction.risk_level", "count": {"$sum": 1}}}
+            ])
+        }
+        total = sum(risk_counts.values())
+        high = risk_counts.get("High", 0)
+        moderate = risk_counts.get("Moderate", 0)
+        counters = {
+            "total_predictions": total,
+            "total_patients": patients_collection.count_documents({}),
+            "high_risk_count": high,
+            "moderate_risk_count": moderate,
+            "low_risk_count": total - high - moderate,
+            "updated_at": datetime.utcnow()
+        }
+        
+        return summary_collection.find_one_and_update(
+            {"_id": SUMMARY_ID},
+            {"$set": counters, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to rebuild stroke summary: {str(e)}"
+        )
+
+def get_stroke_summary() -> Dict[str, Any]:
+    """
+    Read the materialized dashboard counters (one document), building them on first use
+    
+    Returns:
+        dict: total_predictions, total_patients, high/moderate/low_risk_count and version
+    """
+    if summary_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    try:
+        summary = summary_collection.find_one({"_id": SUMMARY_ID})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve stroke summary: {str(e)}"
+        )
+    
+    if summary is None:
+        summary = rebuild_stroke_summary()
+    return summary
+
+def get_stroke_prediction_by_id(prediction_id: str) -> Dict[str, Any]:
+    """
+    Get one stroke prediction by its ID
+    
+    Args:
+        prediction_id: ID of the stroke_data document
+    
+    Returns:
+        dict: The stroke prediction document
+    """
+    return get_stroke_predictions_by_ids([prediction_id])[prediction_id]
+
+def get_stroke_predictions_by_ids(prediction_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get several stroke predictions with one query
+    
+    Args:
+        prediction_ids: IDs of stroke_data documents
+    
+    Returns:
+        dict: Documents keyed by their ID (all requested IDs are present)
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    try:
+        object_ids = [ObjectId(prediction_id) for prediction_id in prediction_ids]
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid prediction id")
+    
+    try:
+        documents = {}
+        for pred in stroke_collection.find({"_id": {"$in": object_ids}}):
+            pred["_id"] = str(pred["_id"])
+            documents[pred["_id"]] = pred
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve stroke predictions: {str(e)}"
+        )
+    
+    missing = [prediction_id for prediction_id in prediction_ids if prediction_id not in documents]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Prediction not found: {', '.join(missing)}")
+    
+    return documents
+
+def label_stroke_outcome(prediction_id: str, stroke: int, labelled_by: int) -> None:
+    """
+    Record the observed outcome of a prediction so it can be used for retraining
+    
+    Args:
+        prediction_id: ID of the stroke_data document
+        stroke: Observed outcome (0 or 1)
+        labelled_by: User ID of the doctor recording the outcome
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    try:
+        object_id = ObjectId(prediction_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid prediction id")
+    
+    try:
+        now = datetime.utcnow()
+        result = stroke_collection.update_one(
+            {"_id": object_id},
+            {"$set": {
+                "outcome": {"stroke": stroke, "labelled_at": now, "labelled_by": labelled_by},
+                "updated_at": now
+            }}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save prediction outcome: {str(e)}"
+        )
+    
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Prediction not found")
 
+def iter_labelled_predictions(
+    after: Optional[Tuple[datetime, str]] = None,
+    batch_size: int = 500
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream documents with a labelled outcome, oldest label first, in batches
+    
+    Args:
+        after: (labelled_at, _id) of the last document already processed
+        batch_size: Documents per batch (also the cursor batch size)
+    
+    Yields:
+        list: Documents with _id, input_data and outcome
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    query = {"outcome.stroke": {"$in": [0, 1]}, "outcome.labelled_at": {"$exists": True}}
+    if after is not None:
+        labelled_at, last_id = after
+        query["$or"] = [
+            {"outcome.labelled_at": {"$gt": labelled_at}},
+            {"outcome.labelled_at": labelled_at, "_id": {"$gt": ObjectId(last_id)}}
+        ]
+    
+    cursor = stroke_collection.find(
+        query,
+        {"input_data": 1, "outcome": 1}
+    ).sort([("outcome.labelled_at", 1), ("_id", 1)]).batch_size(batch_size)
+    
+    batch = []
+    for document in cursor:
+        document["_id"] = str(document["_id"])
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
+def iter_stroke_predictions(
+    query: Optional[Dict[str, Any]] = None,
+    after: Optional[Tuple[datetime, str]] = None,
+    batch_size: int = 2000
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream every matching document, oldest first, in batches from one
+    server-side cursor, so memory stays bounded by batch_size
+    
+    Args:
+        query: Filter from build_prediction_filter
+        after: (created_at, _id) of the last document already processed
+        batch_size: Documents per batch (also the cursor batch size)
+    
+    Yields:
+        list: stroke_data documents with _id as a string
+    """
+    if stroke_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+    
+    conditions = [query] if query else []
+    if after is not None:
+        created_at, last_id = after
+        conditions.append({"$or": [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "_id": {"$gt": ObjectId(last_id)}}
+        ]})
+    if len(conditions) > 1:
+        query = {"$and": conditions}
+    else:
+        query = conditions[0] if conditions else {}
+    
+    # Oldest first: the descending created_at_id index is read in reverse, so there is no in-memory sort
+    cursor = stroke_collection.find(query).sort([("created_at", 1), ("_id", 1)]).batch_size(batch_size)
+    
+    batch = []
+    try:
+        for document in cursor:
+            document["_id"] = str(document["_id"])
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        cursor.close()
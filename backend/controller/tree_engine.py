@@ -0,0 +1,163 @@
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Array-backed evaluator for a fitted RandomForestClassifier.
+
+    Every tree is flattened into shared contiguous arrays (feature, threshold,
+    left/right child, leaf value) and all trees are walked level by level with
+    vectorised NumPy indexing, for one row or many. Leaves point to themselves,
+    so walking `max_depth` levels always ends on a leaf without any branching.
+
+    Node values are either one row per node, or (compact form) a table of
+    unique rows plus a per-node `value_index` into it.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth, value_index=None):
+        self.feature = np.ascontiguousarray(feature)
+        self.threshold = np.ascontiguousarray(threshold)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value)
+        self.value_index = None if value_index is None else np.ascontiguousarray(value_index)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten the trees of a fitted RandomForestClassifier into one set of arrays"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left < 0
+
+            # Leaves loop back to themselves and always send rows "left"
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots),
+            classes=forest.classes_,
+            max_depth=max_depth,
+        )
+
+    def node_values(self, nodes):
+        """Class distribution of the given node indices"""
+        if self.value_index is not None:
+            nodes = self.value_index[nodes]
+        return self.value[nodes]
+
+    def compact(self):
+        """
+        Return an equivalent forest with float32 thresholds and a deduplicated
+        value table. Thresholds are rounded down to the nearest float32, which
+        keeps `x <= threshold` exact because features are compared as float32.
+        """
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+        values = self.node_values(np.arange(self.n_nodes))
+        unique_values, value_index = np.unique(values, axis=0, return_inverse=True)
+
+        return CompiledForest(
+            feature=self.feature.astype(np.int16),
+            threshold=threshold,
+            left=self.left,
+            right=self.right,
+            value=unique_values,
+            roots=self.roots,
+            classes=self.classes,
+            max_depth=self.max_depth,
+            value_index=value_index.reshape(-1).astype(np.int32),
+        )
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_rows, n_trees)"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over all trees, shape (n_rows, n_classes)"""
+        return self.node_values(self.apply(X)).mean(axis=1)
+
+    def contributions(self, X, class_index=-1):
+        """
+        Per-feature contributions to the probability of one class (path
+        decomposition): every split on a row's path credits the change in node
+        value to the feature it split on, averaged over all trees.
+
+        Returns:
+            tuple: (bias of shape (n_rows,), contributions of shape (n_rows, n_features)),
+            where bias + contributions.sum(axis=1) equals predict_proba(X)[:, class_index]
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        values = self.node_values(nodes)[..., class_index]
+        bias = values.mean(axis=1)
+
+        # Flat (row, feature) bins, so each level is a single bincount over all trees
+        offsets = rows * n_features
+        totals = np.zeros(n_rows * n_features)
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            go_left = X[rows, feature] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            # Leaves loop back to themselves, so their delta is zero
+            next_values = self.node_values(nodes)[..., class_index]
+            totals += np.bincount((offsets + feature).ravel(), weights=(next_values - values).ravel(),
+                                  minlength=n_rows * n_features)
+            values = next_values
+
+        return bias, totals.reshape(n_rows, n_features) / self.n_trees
+
+    def predict_with_proba(self, X):
+        """Predicted class and class probabilities from a single pass over the forest"""
+        proba = self.predict_proba(X)
+        return self.classes[np.argmax(proba, axis=1)], proba
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
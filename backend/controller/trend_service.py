@@ -0,0 +1,252 @@
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+from pymongo import UpdateOne
+from database.mongodb_connection import stroke_collection, trends_collection
+from fastapi import HTTPException
+
+# Bucket sizes kept in stroke_trends; weeks start on Monday, all buckets are UTC
+GRANULARITIES = ["day", "week", "month"]
+# Slices every bucket is split by, so any combination can be filtered or grouped on
+TREND_DIMENSIONS = ["gender", "age_band", "work_type"]
+TREND_COUNTERS = ["count", "high_risk_count", "moderate_risk_count", "low_risk_count", "probability_sum"]
+
+# (lower bound, label) in ascending order; ages below the first bound are "0-17"
+AGE_BANDS = [(0, "0-17"), (18, "18-39"), (40, "40-59"), (60, "60-79"), (80, "80+")]
+UNKNOWN = "Unknown"
+
+def bucket_start(created_at: datetime, granularity: str) -> datetime:
+    """
+    Start of the day, week (Monday) or month containing created_at
+
+    Args:
+        created_at: Time of the prediction (UTC)
+        granularity: One of GRANULARITIES
+
+    Returns:
+        datetime: Midnight at the start of the bucket
+    """
+    day = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+def age_band(age: Any) -> str:
+    """Label of the AGE_BANDS entry containing age, or UNKNOWN"""
+    if not isinstance(age, (int, float)):
+        return UNKNOWN
+    label = AGE_BANDS[0][1]
+    for lower, band in AGE_BANDS:
+        if age >= lower:
+            label = band
+    return label
+
+def trend_slice(document: Dict[str, Any]) -> Dict[str, str]:
+    """Dimension values of one stroke_data document"""
+    input_data = document.get("input_data") or {}
+    return {
+        "gender": input_data.get("gender") or UNKNOWN,
+        "age_band": age_band(input_data.get("age")),
+        "work_type": input_data.get("work_type") or UNKNOWN,
+    }
+
+def update_trend_rollups(documents: List[Dict[str, Any]]) -> None:
+    """
+    Add newly inserted documents to their day, week and month buckets. The
+    increments are combined per bucket first and written with one unordered
+    bulk of upserts, so a single prediction costs three small updates.
+
+    Args:
+        documents: Documents that were just inserted into stroke_data
+    """
+    if trends_collection is None or not documents:
+        return
+
+    try:
+        increments = {}
+        for document in documents:
+            dimensions = trend_slice(document)
+            prediction = document.get("prediction", {})
+            risk_level = prediction.get("risk_level")
+            risk_counter = {
+                "High": "high_risk_count",
+                "Moderate": "moderate_risk_count"
+            }.get(risk_level, "low_risk_count")
+
+            for granularity in GRANULARITIES:
+                key = (granularity, bucket_start(document["created_at"], granularity)) + tuple(
+                    dimensions[dimension] for dimension in TREND_DIMENSIONS
+                )
+                bucket = increments.setdefault(key, {counter: 0 for counter in TREND_COUNTERS})
+                bucket["count"] += 1
+                bucket[risk_counter] += 1
+                bucket["probability_sum"] += float(prediction.get("probability") or 0)
+
+        trends_collection.bulk_write([
+            UpdateOne(
+                {"granularity": key[0], "bucket_start": key[1], **dict(zip(TREND_DIMENSIONS, key[2:]))},
+                {"$inc": bucket},
+                upsert=True
+            )
+            for key, bucket in increments.items()
+        ], ordered=False)
+    except Exception as e:
+        # The prediction is saved; the buckets can be rebuilt with rebuild_trend_rollups()
+        print(f"Warning: Failed to update trend rollups: {str(e)}")
+
+def age_band_expression() -> Dict[str, Any]:
+    """Aggregation expression computing age_band() from $input_data.age"""
+    age = "$input_data.age"
+    branches = [
+        {"case": {"$gte": [age, lower]}, "then": band}
+        for lower, band in reversed(AGE_BANDS[1:])
+    ]
+    return {
+        "$cond": [
+            {"$isNumber": age},
+            {"$switch": {"branches": branches, "default": AGE_BANDS[0][1]}},
+            UNKNOWN
+        ]
+    }
+
+def dimension_expression(field: str) -> Dict[str, Any]:
+    """Aggregation expression for $input_data.<field>, with missing, null and "" mapped to UNKNOWN as in trend_slice()"""
+    value = f"$input_data.{field}"
+    return {"$cond": [{"$in": [{"$ifNull": [value, None]}, [None, ""]]}, UNKNOWN, value]}
+
+def trend_rebuild_pipeline() -> List[Dict[str, Any]]:
+    """
+    Aggregation pipeline recomputing every bucket from stroke_data and
+    replacing stroke_trends with the result ($dateTrunc needs MongoDB 5.0)
+    """
+    return [
+        {"$match": {"created_at": {"$type": "date"}}},
+        {"$project": {
+            "gender": dimension_expression("gender"),
+            "age_band": age_band_expression(),
+            "work_type": dimension_expression("work_type"),
+            "high": {"$cond": [{"$eq": ["$prediction.risk_level", "High"]}, 1, 0]},
+            "moderate": {"$cond": [{"$eq": ["$prediction.risk_level", "Moderate"]}, 1, 0]},
+            "probability": {"$ifNull": ["$prediction.probability", 0]},
+            # One entry per granularity, unwound below
+            "buckets": [
+                {
+                    "granularity": granularity,
+                    "start": {"$dateTrunc": {"date": "$created_at", "unit": granularity, "startOfWeek": "monday"}}
+                }
+                for granularity in GRANULARITIES
+            ]
+        }},
+        {"$unwind": "$buckets"},
+        {"$group": {
+            "_id": {
+                "granularity": "$buckets.granularity",
+                "bucket_start": "$buckets.start",
+                **{dimension: f"${dimension}" for dimension in TREND_DIMENSIONS}
+            },
+            "count": {"$sum": 1},
+            "high_risk_count": {"$sum": "$high"},
+            "moderate_risk_count": {"$sum": "$moderate"},
+            "probability_sum": {"$sum": "$probability"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "granularity": "$_id.granularity",
+            "bucket_start": "$_id.bucket_start",
+            **{dimension: f"$_id.{dimension}" for dimension in TREND_DIMENSIONS},
+            "count": 1,
+            "high_risk_count": 1,
+            "moderate_risk_count": 1,
+            "low_risk_count": {"$subtract": ["$count", {"$add": ["$high_risk_count", "$moderate_risk_count"]}]},
+            "probability_sum": 1
+        }},
+        {"$out": trends_collection.name}
+    ]
+
+def rebuild_trend_rollups() -> int:
+    """
+    Recompute stroke_trends from stroke_data with one aggregation pipeline
+
+    Returns:
+        int: Number of bucket documents written
+    """
+    if stroke_collection is None or trends_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+
+    try:
+        stroke_collection.aggregate(trend_rebuild_pipeline(), allowDiskUse=True)
+        return trends_collection.count_documents({})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to rebuild trend rollups: {str(e)}"
+        )
+
+def get_stroke_trends(
+    granularity: str,
+    created_from: datetime,
+    created_to: datetime,
+    group_by: Optional[str] = None,
+    filters: Optional[Dict[str, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Risk counts and average probability per bucket, read from stroke_trends
+
+    Args:
+        granularity: One of GRANULARITIES
+        created_from: Start of the range; the bucket containing it is included
+        created_to: End of the range (exclusive)
+        group_by: Optional dimension to split every bucket by
+        filters: Optional {dimension: value} to restrict the slices
+
+    Returns:
+        list: One point per bucket (and group), oldest first
+    """
+    if trends_collection is None:
+        raise HTTPException(
+            status_code=500,
+            detail="MongoDB connection not available"
+        )
+
+    try:
+        match = {
+            "granularity": granularity,
+            "bucket_start": {"$gte": bucket_start(created_from, granularity), "$lt": created_to},
+            **(filters or {})
+        }
+        group_id = {"bucket_start": "$bucket_start"}
+        if group_by:
+            group_id["group"] = f"${group_by}"
+
+        rows = trends_collection.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": group_id,
+                **{counter: {"$sum": f"${counter}"} for counter in TREND_COUNTERS}
+            }},
+            {"$sort": {"_id.bucket_start": 1, "_id.group": 1}}
+        ])
+
+        return [
+            {
+                "bucket_start": row["_id"]["bucket_start"],
+                "group": row["_id"].get("group"),
+                "count": row["count"],
+                "high_risk_count": row["high_risk_count"],
+                "moderate_risk_count": row["moderate_risk_count"],
+                "low_risk_count": row["low_risk_count"],
+                "average_probability": row["probability_sum"] / row["count"] if row["count"] else 0.0
+            }
+            for row in rows
+        ]
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve stroke trends: {str(e)}"
+        )
@@ -0,0 +1,94 @@
+import os
+from sqlalchemy import text
+from fastapi import HTTPException
+from .cache import TTLCache
+
+USER_CACHE_SIZE = int(os.getenv("user_cache_size") or 10000)
+USER_CACHE_TTL = float(os.getenv("user_cache_ttl") or 300)
+
+# Lookups are padded up to one of these sizes, so MySQL only ever sees a
+# handful of distinct statements (which it can prepare and cache)
+LOOKUP_SIZES = (8, 32, 128)
+LOOKUP_QUERIES = {
+    size: text(
+        "SELECT id, name FROM users WHERE id IN ("
+        + ", ".join(f":id{i}" for i in range(size))
+        + ")"
+    )
+    for size in LOOKUP_SIZES
+}
+
+# Most users a name search turns into a user_id filter; a broader prefix is rejected
+NAME_MATCH_LIMIT = 1000
+NAME_PREFIX_QUERY = text("SELECT id FROM users WHERE name LIKE :prefix ORDER BY id LIMIT :limit")
+
+
+class UserDirectory:
+    """
+    In-process id -> display name cache for the dashboard. Names are kept
+    for `ttl` seconds; ids that do not exist are remembered separately and
+    forgotten on signup, so a new account shows up right away.
+    """
+
+    def __init__(self, max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL):
+        self._names = TTLCache(max_size, ttl)
+        self._unknown = TTLCache(max_size, ttl)
+
+    def get_names(self, db, user_ids):
+        """
+        Return {user_id: name} for the given ids, fetching cache misses from
+        MySQL in padded chunks (one query for a dashboard page).
+        """
+        names = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            name = self._names.get(user_id)
+            if name is not None:
+                names[user_id] = name
+            elif self._unknown.get(user_id) is None:
+                missing.append(user_id)
+
+        largest = LOOKUP_SIZES[-1]
+        for start in range(0, len(missing), largest):
+            chunk = missing[start:start + largest]
+            size = next(size for size in LOOKUP_SIZES if size >= len(chunk))
+            padded = chunk + [chunk[-1]] * (size - len(chunk))
+            rows = db.execute(LOOKUP_QUERIES[size], {f"id{i}": user_id for i, user_id in enumerate(padded)}).fetchall()
+
+            found = {row.id: row.name for row in rows}
+            for user_id in chunk:
+                if user_id in found:
+                    self._names.set(user_id, found[user_id])
+                    names[user_id] = found[user_id]
+                else:
+                    self._unknown.set(user_id, True)
+
+        return names
+
+    def find_ids_by_name_prefix(self, db, prefix):
+        """
+        Ids of users whose name starts with `prefix`. Raises a 400 when more than
+        NAME_MATCH_LIMIT users match, rather than filtering on an incomplete list.
+        """
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = db.execute(NAME_PREFIX_QUERY, {"prefix": escaped + "%", "limit": NAME_MATCH_LIMIT + 1}).fetchall()
+        if len(rows) > NAME_MATCH_LIMIT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"More than {NAME_MATCH_LIMIT} patients match this name, please type more of it"
+            )
+        return [row.id for row in rows]
+
+    def invalidate(self, user_id=None):
+        """Forget one user (profile change), or every cached miss (signup) when no id is given"""
+        if user_id is None:
+            self._unknown.clear()
+        else:
+            self._names.pop(user_id)
+            self._unknown.pop(user_id)
+
+    def stats(self):
+        return {'names': self._names.stats(), 'unknown': self._unknown.stats()}
+
+
+user_directory = UserDirectory()
@@ -1,4 +1,4 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure
 from dotenv import load_dotenv
 import os
@@ -10,7 +10,43 @@ MONGODB_PASSWORD = os.getenv("mongo_password")
 MONGODB_CLUSTER = os.getenv("mongo_cluster")
 MONGODB_DB_NAME = os.getenv("mongo_name")
 
+# Indexes behind every query in stroke_data_service (created by ensure_indexes).
+# Pages sort on (created_at, _id), so the filtered indexes end with both
+STROKE_DATA_INDEXES = [
+    # Dashboard pages, newest first, and the keyset cursor
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    # A patient's own predictions
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_id_created_at_id"),
+    # Dashboard filtered by risk level
+    IndexModel([("prediction.risk_level", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="risk_level_created_at_id"),
+    # Dashboard search by email prefix
+    IndexModel([("user_email", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_email_created_at_id"),
+    # Dashboard filtered by gender, and the filtered counts
+    IndexModel([("input_data.gender", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="gender_created_at_id"),
+    # Dashboard filtered by an age range, and the filtered counts
+    IndexModel([("input_data.age", ASCENDING)], name="age"),
+    # Labelled outcomes streamed by retrain_model.py
+    IndexModel(
+        [("outcome.labelled_at", ASCENDING), ("_id", ASCENDING)],
+        name="outcome_labelled_at_id",
+        partialFilterExpression={"outcome.labelled_at": {"$exists": True}}
+    ),
+]
+
+# Time buckets of stroke_trends, one document per (granularity, start, slice)
+STROKE_TRENDS_INDEXES = [
+    IndexModel(
+        [("granularity", ASCENDING), ("bucket_start", ASCENDING), ("gender", ASCENDING),
+         ("age_band", ASCENDING), ("work_type", ASCENDING)],
+        name="granularity_bucket_start_slice",
+        unique=True
+    ),
+]
+
 stroke_collection = None
+summary_collection = None
+patients_collection = None
+trends_collection = None
 client = None
 db = None
 
@@ -23,11 +59,14 @@ def init_mongo():
     - If env vars are missing, the app skips Mongo and continues with MySQL.
     - If connection fails, it logs the error and keeps stroke_collection = None.
     """
-    global client, db, stroke_collection
+    global client, db, stroke_collection, summary_collection, patients_collection, trends_collection
 
     if not all([MONGODB_USERNAME, MONGODB_PASSWORD, MONGODB_CLUSTER, MONGODB_DB_NAME]):
         print("MongoDB not configured. Skipping Mongo connection.")
         stroke_collection = None
+        summary_collection = None
+        patients_collection = None
+        trends_collection = None
         return
 
     mongodb_uri = (
@@ -48,6 +87,11 @@ def init_mongo():
 
         db = client[MONGODB_DB_NAME]
         stroke_collection = db["stroke_data"]
+        # Materialized dashboard counters and the distinct patients behind total_patients
+        summary_collection = db["stroke_summary"]
+        patients_collection = db["stroke_patients"]
+        # Day/week/month risk rollups behind /dashboard/trends
+        trends_collection = db["stroke_trends"]
 
         print("MongoDB connection initialised successfully.")
 
@@ -56,11 +100,31 @@ def init_mongo():
         client = None
         db = None
         stroke_collection = None
+        summary_collection = None
+        patients_collection = None
+        trends_collection = None
     except Exception as e:
         print(f"MongoDB connection error: {e}")
         client = None
         db = None
         stroke_collection = None
+        summary_collection = None
+        patients_collection = None
+        trends_collection = None
+
+
+def ensure_indexes():
+    """
+    Create the declared stroke_data and stroke_trends indexes. Safe to run on
+    every startup: indexes that already exist with the same definition are left alone.
+
+    Returns:
+        list: names of the declared indexes, or [] if MongoDB is not available
+    """
+    if stroke_collection is None:
+        return []
+    return (stroke_collection.create_indexes(STROKE_DATA_INDEXES)
+            + trends_collection.create_indexes(STROKE_TRENDS_INDEXES))
 
 
 init_mongo()
@@ -1,10 +1,17 @@
 import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
 from urllib.parse import quote_plus  # NEW
 
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+from fastapi import HTTPException
 
 # Load .env from the backend folder
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,6 +28,113 @@ DB_NAME = os.getenv("dbname", "stroke_db")
 
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL)
+# Connections kept open per worker process, and extra ones opened under load
+DB_POOL_SIZE = int(os.getenv("db_pool_size") or 10)
+DB_MAX_OVERFLOW = int(os.getenv("db_max_overflow") or 20)
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("db_pool_timeout") or 10)
+# Reconnect connections older than this, below MySQL's wait_timeout
+DB_POOL_RECYCLE = int(os.getenv("db_pool_recycle") or 1800)
+# Test each connection on checkout so a dropped one is replaced instead of failing the request
+DB_POOL_PRE_PING = (os.getenv("db_pool_pre_ping") or "true").lower() in ("1", "true", "yes")
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 Session = sessionmaker(bind=engine)
-db = engine.connect()
+
+
+class PoolMetrics:
+    """Checkout wait times of the connection pool (recent samples for percentiles)"""
+
+    def __init__(self, samples=1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=samples)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._waits.append(wait)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts = self.checkouts
+            average = self.total_wait / checkouts if checkouts else 0.0
+            p95 = waits[int(0.95 * (len(waits) - 1))] if waits else 0.0
+            return {
+                'checkouts': checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms_avg': round(average * 1000, 3),
+                'wait_ms_p95': round(p95 * 1000, 3),
+                'wait_ms_max': round(self.max_wait * 1000, 3),
+                'pool_size': engine.pool.size(),
+                'checked_out': engine.pool.checkedout(),
+                'overflow': engine.pool.overflow(),
+                'idle': engine.pool.checkedin(),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+def checkout():
+    """Take a connection from the pool, recording how long the wait was"""
+    start = time.perf_counter()
+    try:
+        connection = engine.connect()
+    except PoolTimeoutError:
+        pool_metrics.record(time.perf_counter() - start, timed_out=True)
+        raise
+    pool_metrics.record(time.perf_counter() - start)
+    return connection
+
+
+@contextmanager
+def get_connection():
+    """
+    A pooled connection for one unit of work. It is returned to the pool on
+    exit, and anything not committed is rolled back, so one request's
+    failure never leaks into another's.
+    """
+    connection = checkout()
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+def pool_busy():
+    """The 503 for a request that found no free connection within DB_POOL_TIMEOUT"""
+    return HTTPException(
+        status_code=503,
+        detail="The database is busy, please try again",
+        headers={"Retry-After": "1"}
+    )
+
+
+def get_db():
+    """FastAPI dependency: a pooled connection for the duration of the request"""
+    try:
+        connection = checkout()
+    except PoolTimeoutError:
+        raise pool_busy()
+    try:
+        yield connection
+    finally:
+        connection.close()
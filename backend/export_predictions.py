@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from controller.stroke_data_service import build_prediction_filter, iter_stroke_predictions
+from controller.export_service import csv_text, parquet_schema, parquet_table, parquet_writer, PARQUET_AVAILABLE
+
+# Parquet exports are a directory of part files; a part is closed (and checkpointed) after this many rows
+ROWS_PER_PART = 1_000_000
+
+
+def checkpoint_path(output):
+    return output.rstrip(os.sep) + ".checkpoint.json"
+
+
+def load_checkpoint(output, resume):
+    """The saved progress of an interrupted export, or a fresh state"""
+    path = checkpoint_path(output)
+    if resume and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"rows": 0, "last_created_at": None, "last_id": None, "csv_bytes": 0, "parts": 0}
+
+
+def save_checkpoint(output, state):
+    """Write the checkpoint through a rename, so it is never half written"""
+    path = checkpoint_path(output)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def advance(state, batch):
+    """Move the checkpoint past the last document of a written batch"""
+    last = batch[-1]
+    state["rows"] += len(batch)
+    state["last_created_at"] = last["created_at"].isoformat()
+    state["last_id"] = last["_id"]
+
+
+def export_csv(output, batches, state):
+    """
+    Append batches to one CSV file, checkpointing the file size after each
+    batch. On resume, anything written after the checkpoint is cut off first.
+    """
+    mode = "r+b" if state["csv_bytes"] else "wb"
+    with open(output, mode) as f:
+        f.seek(state["csv_bytes"])
+        f.truncate()
+        if not state["csv_bytes"]:
+            f.write(csv_text([], header=True).encode("utf-8"))
+
+        for batch in batches:
+            f.write(csv_text(batch).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            advance(state, batch)
+            state["csv_bytes"] = f.tell()
+            save_checkpoint(output, state)
+            print(f"Exported {state['rows']} rows")
+
+
+def export_parquet(output, batches, state, rows_per_part=ROWS_PER_PART):
+    """
+    Write batches as row groups of part-NNNNN.parquet files in the output
+    directory. A part is only checkpointed once it is closed (its footer
+    written), so a resume drops the unfinished part and rewrites it.
+    """
+    os.makedirs(output, exist_ok=True)
+    for name in os.listdir(output):
+        if name.startswith("part-") and int(name[5:10]) >= state["parts"]:
+            os.remove(os.path.join(output, name))
+
+    schema = parquet_schema()
+    writer = None
+    part_rows = 0
+    pending = dict(state)
+
+    for batch in batches:
+        if writer is None:
+            path = os.path.join(output, f"part-{pending['parts']:05d}.parquet")
+            writer = parquet_writer(path, schema)
+        writer.write_table(parquet_table(batch, schema))
+        part_rows += len(batch)
+        advance(pending, batch)
+
+        if part_rows >= rows_per_part:
+            writer.close()
+            writer = None
+            part_rows = 0
+            pending["parts"] += 1
+            state.update(pending)
+            save_checkpoint(output, state)
+            print(f"Exported {state['rows']} rows")
+
+    if writer is not None:
+        writer.close()
+        pending["parts"] += 1
+        state.update(pending)
+
+
+def export_predictions(output, export_format, created_from=None, created_to=None, batch_size=2000, resume=False):
+    """
+    Export stroke_data to a CSV file or a directory of Parquet files,
+    streaming from one MongoDB cursor with memory bounded by batch_size
+    """
+    if export_format == "parquet" and not PARQUET_AVAILABLE:
+        print("Parquet export requires pyarrow (pip install pyarrow)")
+        return False
+
+    try:
+        state = load_checkpoint(output, resume)
+        filters = {
+            "created_from": created_from.isoformat() if created_from else None,
+            "created_to": created_to.isoformat() if created_to else None,
+            "format": export_format,
+        }
+        if state.get("filters", filters) != filters:
+            print("The checkpoint was made with other options; run without --resume to start over")
+            return False
+        state["filters"] = filters
+        if state["rows"]:
+            print(f"Resuming after {state['rows']} rows")
+
+        after = None
+        if state["last_id"]:
+            after = (datetime.fromisoformat(state["last_created_at"]), state["last_id"])
+        batches = iter_stroke_predictions(
+            build_prediction_filter(created_from=created_from, created_to=created_to),
+            after=after,
+            batch_size=batch_size
+        )
+
+        if export_format == "parquet":
+            export_parquet(output, batches, state)
+        else:
+            export_csv(output, batches, state)
+
+        # Finished: nothing left to resume
+        if os.path.exists(checkpoint_path(output)):
+            os.remove(checkpoint_path(output))
+        print(f"Export complete: {state['rows']} rows written to {output}")
+        return True
+
+    except Exception as e:
+        print(f"Error exporting predictions: {str(getattr(e, 'detail', e))}")
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export all stroke predictions from MongoDB to CSV or Parquet")
+    parser.add_argument("output", help="CSV file, or directory of part files for Parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="Defaults to parquet when the output ends in .parquet, else csv")
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat, default=None,
+                        help="Only predictions made at or after this ISO date")
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat, default=None,
+                        help="Only predictions made before this ISO date")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Documents per MongoDB batch")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted export from its checkpoint")
+    args = parser.parse_args()
+
+    export_format = args.format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    ok = export_predictions(
+        args.output,
+        export_format,
+        created_from=args.created_from,
+        created_to=args.created_to,
+        batch_size=args.batch_size,
+        resume=args.resume,
+    )
+    sys.exit(0 if ok else 1)
@@ -1,7 +1,7 @@
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from database.mySql_connection import db, engine
+from database.mySql_connection import get_connection
 from sqlalchemy import text
 
 def init_database():
@@ -17,14 +17,15 @@ def init_database():
         );
         """)
         
-        db.execute(create_table_query)
-        db.commit()
+        # Leaving the block returns the connection to the pool (rolled back if not committed)
+        with get_connection() as db:
+            db.execute(create_table_query)
+            db.commit()
         print("Database tables created successfully!")
         return True
         
     except Exception as e:
         print(f"Error creating tables: {str(e)}")
-        db.rollback()
         return False
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import sys
+import os
+import argparse
+from datetime import datetime
+from bson import ObjectId
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import database.mongodb_connection as mongo
+
+def query_checks(collection):
+    """
+    The query shapes stroke_data_service runs, as (description, cursor) pairs.
+    Sample values come from the newest document so the plans are realistic.
+    """
+    sample = collection.find_one(sort=[("created_at", -1), ("_id", -1)]) or {}
+    created_at = sample.get("created_at", datetime.utcnow())
+    last_id = sample.get("_id", ObjectId())
+    user_id = sample.get("user_id", 0)
+    newest_first = [("created_at", -1), ("_id", -1)]
+
+    return [
+        ("dashboard page (skip/limit)",
+         collection.find({}).sort(newest_first).skip(10).limit(11)),
+        ("dashboard page (cursor)",
+         collection.find({"$or": [
+             {"created_at": {"$lt": created_at}},
+             {"created_at": created_at, "_id": {"$lt": last_id}}
+         ]}).sort(newest_first).limit(11)),
+        ("predictions of one user",
+         collection.find({"user_id": user_id}).sort("created_at", -1).limit(100)),
+        ("patient history page (cursor)",
+         collection.find({"$and": [{"user_id": user_id}, {"$or": [
+             {"created_at": {"$lt": created_at}},
+             {"created_at": created_at, "_id": {"$lt": last_id}}
+         ]}]}, {"prediction": 1, "created_at": 1}).sort(newest_first).limit(11)),
+        ("predictions by risk level",
+         collection.find({"prediction.risk_level": "High"}).sort(newest_first).limit(11)),
+        ("predictions by email prefix",
+         collection.find({"user_email": {"$regex": "^patient_1"}}).sort(newest_first).limit(11)),
+        ("predictions by gender",
+         collection.find({"input_data.gender": "Female"}).sort(newest_first).limit(11)),
+        ("prediction counts in an age range",
+         collection.find({"input_data.age": {"$gte": 60, "$lte": 80}}, {"prediction.risk_level": 1, "user_id": 1})),
+        ("predictions in a date range",
+         collection.find({"created_at": {"$gte": created_at, "$lt": datetime.utcnow()}}).sort(newest_first).limit(11)),
+        ("export resumed after a checkpoint",
+         collection.find({"$or": [
+             {"created_at": {"$gt": created_at}},
+             {"created_at": created_at, "_id": {"$gt": last_id}}
+         ]}).sort([("created_at", 1), ("_id", 1)])),
+        ("predictions by id",
+         collection.find({"_id": {"$in": [last_id]}})),
+        ("labelled outcomes since checkpoint",
+         collection.find({
+             "outcome.stroke": {"$in": [0, 1]},
+             "outcome.labelled_at": {"$exists": True}
+         }).sort([("outcome.labelled_at", 1), ("_id", 1)])),
+    ]
+
+def plan_stages(plan):
+    """Flatten a winning plan into (stage, index name) pairs"""
+    stages = [(plan.get("stage"), plan.get("indexName"))]
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages.extend(plan_stages(child))
+    return stages
+
+def explain_queries():
+    """Print the winning plan of every service query and flag collection scans and in-memory sorts"""
+    ok = True
+    for description, cursor in query_checks(mongo.stroke_collection):
+        planner = cursor.explain().get("queryPlanner", {})
+        plan = planner.get("winningPlan", {})
+        # Newer servers nest the classic plan under queryPlan
+        stages = plan_stages(plan.get("queryPlan", plan))
+        names = [stage for stage, _ in stages]
+        indexes = sorted({index for _, index in stages if index})
+
+        problems = []
+        if "COLLSCAN" in names:
+            problems.append("collection scan")
+        if "SORT" in names:
+            problems.append("in-memory sort")
+        ok = ok and not problems
+
+        status = "WARN" if problems else "OK"
+        print(f"[{status}] {description}: {' <- '.join(names)}"
+              f" (index: {', '.join(indexes) or 'none'}){' - ' + ', '.join(problems) if problems else ''}")
+    return ok
+
+def init_mongo_indexes(explain=False):
+    try:
+        if mongo.stroke_collection is None:
+            print("MongoDB is not available, nothing to do")
+            return False
+
+        for name in mongo.ensure_indexes():
+            print(f"Index ready: {name}")
+        print("MongoDB indexes created successfully!")
+
+        if explain:
+            return explain_queries()
+        return True
+
+    except Exception as e:
+        print(f"Error creating MongoDB indexes: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the stroke_data indexes in MongoDB")
+    parser.add_argument("--explain", action="store_true", help="Print the query plan of every service query")
+    args = parser.parse_args()
+
+    sys.exit(0 if init_mongo_indexes(explain=args.explain) else 1)
@@ -0,0 +1,180 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, ParameterGrid, ParameterSampler
+from sklearn.metrics import f1_score, precision_score, recall_score
+from imblearn.over_sampling import SMOTE
+
+from controller.tree_engine import CompiledForest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "search")
+LEADERBOARD_PATH = os.path.join(BASE_DIR, "search_leaderboard.csv")
+
+PARAM_GRID = {
+    "n_estimators": [100, 200, 300],
+    "max_depth": [6, 10, 14, None],
+    "min_samples_split": [2, 5, 10],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", 0.5],
+    "class_weight": [None, "balanced_subsample"],
+}
+
+FOLD_ARRAYS = ["X_train", "y_train", "X_val", "y_val"]
+LATENCY_REPEATS = 200
+
+
+def grid_candidates(grid=PARAM_GRID):
+    return list(ParameterGrid(grid))
+
+
+def random_candidates(n_iter, grid=PARAM_GRID, random_state=42):
+    return list(ParameterSampler(grid, n_iter=n_iter, random_state=random_state))
+
+
+def build_fold_cache(X, y, n_folds=5, random_state=42, cache_dir=CACHE_DIR):
+    """
+    Split X/y into stratified folds, oversample each training part with SMOTE
+    (inside the fold, so validation rows never leak into synthetic samples) and
+    save every array as .npy. The cache is keyed by the data and split settings,
+    so later candidates and later runs reuse it instead of redoing the work.
+
+    Returns:
+        list: one directory per fold
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(f"{n_folds}-{random_state}".encode())
+    root = os.path.join(cache_dir, digest.hexdigest()[:16])
+
+    folds = [os.path.join(root, f"fold{i}") for i in range(n_folds)]
+    if all(os.path.exists(os.path.join(fold, "y_val.npy")) for fold in folds):
+        return folds
+
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fold, (train_idx, val_idx) in zip(folds, splitter.split(X, y)):
+        os.makedirs(fold, exist_ok=True)
+        X_train, y_train = SMOTE(random_state=random_state).fit_resample(X[train_idx], y[train_idx])
+        arrays = {"X_train": X_train, "y_train": y_train, "X_val": X[val_idx], "y_val": y[val_idx]}
+        for name in FOLD_ARRAYS:
+            np.save(os.path.join(fold, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+
+    return folds
+
+
+def load_fold(fold):
+    return [np.load(os.path.join(fold, f"{name}.npy"), mmap_mode="r") for name in FOLD_ARRAYS]
+
+
+def single_row_latency_us(model, X):
+    """Median latency of one-row inference through the serving engine"""
+    engine = CompiledForest.from_sklearn(model)
+    row = np.asarray(X[:1])
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        engine.predict_with_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def evaluate_candidate(params, folds, scoring="f1", min_folds=2, stop_below=None, random_state=42):
+    """
+    Cross-validate one parameter set fold by fold (runs in a worker process).
+    Stops early once `min_folds` folds are done and the mean score is below
+    `stop_below`, since such a candidate cannot win.
+    """
+    scores = {"f1": [], "precision": [], "recall": []}
+    fit_times = []
+    model = None
+    X_val = None
+
+    for i, fold in enumerate(folds):
+        X_train, y_train, X_val, y_val = load_fold(fold)
+
+        model = RandomForestClassifier(random_state=random_state, n_jobs=1, **params)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_times.append(time.perf_counter() - start)
+
+        y_pred = model.predict(X_val)
+        scores["f1"].append(f1_score(y_val, y_pred, zero_division=0))
+        scores["precision"].append(precision_score(y_val, y_pred, zero_division=0))
+        scores["recall"].append(recall_score(y_val, y_pred, zero_division=0))
+
+        if stop_below is not None and i + 1 >= min_folds and i + 1 < len(folds):
+            if np.mean(scores[scoring]) < stop_below:
+                break
+
+    return {
+        "params": params,
+        "folds_completed": len(fit_times),
+        "stopped_early": len(fit_times) < len(folds),
+        "mean_f1": float(np.mean(scores["f1"])),
+        "std_f1": float(np.std(scores["f1"])),
+        "mean_precision": float(np.mean(scores["precision"])),
+        "mean_recall": float(np.mean(scores["recall"])),
+        "score": float(np.mean(scores[scoring])),
+        "fit_time_s": float(np.mean(fit_times)),
+        "inference_latency_us": single_row_latency_us(model, X_val),
+    }
+
+
+def run_search(X, y, candidates, n_folds=5, workers=None, scoring="f1",
+               early_stop_ratio=0.9, min_folds=2, random_state=42):
+    """
+    Evaluate candidates in a process pool and return them ranked by score.
+    Each new submission is told the best full-CV score seen so far, so weak
+    candidates stop after `min_folds` folds (disable with early_stop_ratio=None).
+    """
+    folds = build_fold_cache(X, y, n_folds=n_folds, random_state=random_state)
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    best = None
+    remaining = list(candidates)
+    pending = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while remaining or pending:
+            while remaining and len(pending) < workers:
+                stop_below = best * early_stop_ratio if best is not None and early_stop_ratio else None
+                pending.add(executor.submit(
+                    evaluate_candidate, remaining.pop(0), folds, scoring, min_folds, stop_below, random_state
+                ))
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                if not result["stopped_early"] and (best is None or result["score"] > best):
+                    best = result["score"]
+                print(f"[{len(results)}/{len(candidates)}] {scoring}={result['score']:.4f} "
+                      f"folds={result['folds_completed']} {result['params']}")
+
+    # Fully evaluated candidates rank above early-stopped ones
+    results.sort(key=lambda r: (not r["stopped_early"], r["score"]), reverse=True)
+    return results
+
+
+def write_leaderboard(results, path=LEADERBOARD_PATH):
+    columns = [
+        "rank", "score", "mean_f1", "std_f1", "mean_precision", "mean_recall",
+        "folds_completed", "stopped_early", "fit_time_s", "inference_latency_us", "params",
+    ]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for rank, result in enumerate(results, start=1):
+            row = {key: result[key] for key in columns if key in result}
+            row["rank"] = rank
+            row["params"] = json.dumps(result["params"], default=str)
+            writer.writerow(row)
+    return path
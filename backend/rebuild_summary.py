@@ -0,0 +1,24 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from controller.stroke_data_service import rebuild_stroke_summary, SUMMARY_COUNTERS
+from controller.trend_service import rebuild_trend_rollups
+
+def rebuild_summary():
+    """Recompute the materialized dashboard counters and trend rollups from stroke_data"""
+    try:
+        summary = rebuild_stroke_summary()
+        for counter in SUMMARY_COUNTERS:
+            print(f"{counter}: {summary[counter]}")
+        print("Stroke summary rebuilt successfully!")
+        
+        print(f"trend buckets: {rebuild_trend_rollups()}")
+        print("Stroke trends rebuilt successfully!")
+        return True
+    
+    except Exception as e:
+        print(f"Error rebuilding stroke summary: {str(getattr(e, 'detail', e))}")
+        return False
+
+if __name__ == "__main__":
+    rebuild_summary()
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from datetime import datetime
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from imblearn.over_sampling import SMOTE
+
+from controller.preprocess import FittedPreprocessor
+from controller.model_registry import get_current_version, load_metadata, load_sklearn_model, publish_model
+from controller.stroke_data_service import iter_labelled_predictions
+from train_model import BASE_DIR, load_training_data, evaluate_model
+
+RETRAIN_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "retrain")
+
+# Share of labelled documents kept out of training for the publish decision
+HOLDOUT_FRACTION = 0.2
+PSI_BINS = 10
+
+
+def feedback_dir(dataset_hash, cache_dir=RETRAIN_CACHE_DIR):
+    """Labelled rows are stored per base dataset, since they are transformed with its preprocessor"""
+    return os.path.join(cache_dir, dataset_hash[:16])
+
+
+def load_feedback(directory, n_features):
+    """
+    Return the labelled rows collected so far and the checkpoint state.
+
+    Returns:
+        tuple: (ids, X, y, state)
+    """
+    state_path = os.path.join(directory, "checkpoint.json")
+    if not os.path.exists(state_path):
+        return np.empty(0, dtype="U24"), np.empty((0, n_features)), np.empty(0, dtype=np.int64), {}
+
+    with open(state_path) as f:
+        state = json.load(f)
+    ids = np.load(os.path.join(directory, "ids.npy"))
+    X = np.load(os.path.join(directory, "X.npy"))
+    y = np.load(os.path.join(directory, "y.npy"))
+    return ids, X, y, state
+
+
+def save_feedback(directory, ids, X, y, state):
+    """Write the arrays first and the checkpoint last, each through a rename"""
+    os.makedirs(directory, exist_ok=True)
+    for name, array in (("ids", ids), ("X", X), ("y", y)):
+        tmp_path = os.path.join(directory, f"{name}.tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+
+    tmp_path = os.path.join(directory, "checkpoint.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, "checkpoint.json"))
+
+
+def ingest_labelled(preprocessor, ids, X, y, state, batch_size=500):
+    """
+    Stream documents labelled since the checkpoint and merge them into the
+    feedback arrays. A document whose label was corrected replaces its old row.
+
+    Returns:
+        tuple: (ids, X, y, state, number of documents read)
+    """
+    after = None
+    if state.get("last_labelled_at"):
+        after = (datetime.fromisoformat(state["last_labelled_at"]), state["last_id"])
+
+    positions = {doc_id: i for i, doc_id in enumerate(ids)}
+    new_ids, new_rows, new_labels = [], [], []
+    read = 0
+
+    for batch in iter_labelled_predictions(after=after, batch_size=batch_size):
+        read += len(batch)
+        batch_X, errors = preprocessor.transform_records([doc.get("input_data", {}) for doc in batch])
+        for doc, row, error in zip(batch, batch_X, errors):
+            if error is not None:
+                print(f"Skipping {doc['_id']}: {error}")
+                continue
+            label = int(doc["outcome"]["stroke"])
+            if doc["_id"] in positions:
+                X[positions[doc["_id"]]] = row
+                y[positions[doc["_id"]]] = label
+            else:
+                positions[doc["_id"]] = len(ids) + len(new_ids)
+                new_ids.append(doc["_id"])
+                new_rows.append(row)
+                new_labels.append(label)
+
+        last = batch[-1]
+        state["last_labelled_at"] = last["outcome"]["labelled_at"].isoformat()
+        state["last_id"] = last["_id"]
+
+    if new_ids:
+        ids = np.concatenate([ids, np.asarray(new_ids, dtype="U24")])
+        X = np.vstack([X, np.vstack(new_rows)])
+        y = np.concatenate([y, np.asarray(new_labels, dtype=np.int64)])
+
+    return ids, X, y, state, read
+
+
+def holdout_mask(ids):
+    """Stable holdout assignment by document id, so rows never move between train and holdout"""
+    buckets = [int(hashlib.sha256(doc_id.encode()).hexdigest()[:8], 16) % 100 for doc_id in ids]
+    return np.asarray(buckets, dtype=np.int64) < HOLDOUT_FRACTION * 100
+
+
+def population_stability(expected, actual, bins=PSI_BINS):
+    """
+    Population stability index of every feature of `actual` against `expected`,
+    using quantile bins of `expected`.
+
+    Returns:
+        np.ndarray: PSI per feature
+    """
+    psi = np.zeros(expected.shape[1])
+    for i in range(expected.shape[1]):
+        edges = np.unique(np.quantile(expected[:, i], np.linspace(0, 1, bins + 1)[1:-1]))
+        expected_share = np.bincount(np.searchsorted(edges, expected[:, i], side="right"), minlength=len(edges) + 1)
+        actual_share = np.bincount(np.searchsorted(edges, actual[:, i], side="right"), minlength=len(edges) + 1)
+        expected_share = np.maximum(expected_share / len(expected), 1e-4)
+        actual_share = np.maximum(actual_share / len(actual), 1e-4)
+        psi[i] = np.sum((actual_share - expected_share) * np.log(actual_share / expected_share))
+    return psi
+
+
+def retrain_once(batch_size=500, min_new_rows=50, add_trees=20, drift_threshold=0.2,
+                 scoring="f1_score", min_improvement=0.0, n_jobs=1, force=False):
+    """
+    Run one retraining cycle: ingest newly labelled documents, grow or refit
+    the current model and publish it only if it beats the current version on
+    the holdout (base test split plus held-out labelled documents).
+
+    Returns:
+        str: the published version, or None if nothing was published
+    """
+    X_base, y_base, artifact, dataset_hash = load_training_data()
+    preprocessor = FittedPreprocessor.from_artifact(artifact)
+
+    # 1. pull labelled documents since the checkpoint
+    directory = feedback_dir(dataset_hash)
+    ids, X_feedback, y_feedback, state = load_feedback(directory, preprocessor.n_features)
+    ids, X_feedback, y_feedback, state, read = ingest_labelled(
+        preprocessor, ids, X_feedback, y_feedback, state, batch_size
+    )
+    if read:
+        save_feedback(directory, ids, X_feedback, y_feedback, state)
+    print(f"Read {read} labelled documents, {len(ids)} labelled rows in total")
+
+    new_rows = len(ids) - state.get("trained_rows", 0)
+    if not force and new_rows < min_new_rows:
+        print(f"{new_rows} new labelled rows (< {min_new_rows}), nothing to retrain")
+        return None
+
+    current_version = get_current_version()
+    if current_version is None:
+        print("No published model version, run train_model.py first")
+        return None
+    current_metadata = load_metadata(current_version)
+    current_model = load_sklearn_model(current_version)
+
+    # 2. merge with the cached base dataset, keeping the same base split as train_model.py
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_base, y_base, test_size=0.2, random_state=42, stratify=y_base
+    )
+    if len(ids):
+        holdout = holdout_mask(ids)
+        X_train = np.vstack([X_train, X_feedback[~holdout]])
+        y_train = np.concatenate([y_train, y_feedback[~holdout]])
+        X_test = np.vstack([X_test, X_feedback[holdout]])
+        y_test = np.concatenate([y_test, y_feedback[holdout]])
+    X_train, y_train = SMOTE(random_state=42).fit_resample(X_train, y_train)
+
+    # 3. grow the forest, or refit when the new data has drifted or the preprocessing changed
+    psi = population_stability(X_base, X_feedback) if len(ids) else np.zeros(preprocessor.n_features)
+    drifted = float(psi.max()) > drift_threshold
+    same_base = current_metadata.get("training_data_hash") == dataset_hash
+
+    if drifted or not same_base:
+        mode = "refit"
+        candidate = clone(current_model).set_params(warm_start=False, n_jobs=n_jobs)
+    else:
+        mode = "warm_start"
+        candidate = load_sklearn_model(current_version)
+        candidate.set_params(
+            warm_start=True,
+            n_estimators=len(candidate.estimators_) + add_trees,
+            n_jobs=n_jobs,
+        )
+
+    start = time.perf_counter()
+    candidate.fit(X_train, y_train)
+    candidate.set_params(warm_start=False)
+    fit_time = time.perf_counter() - start
+
+    # 4. publish only if the candidate beats the current version on the holdout
+    current_metrics = evaluate_model(current_model, X_test, y_test)
+    metrics = evaluate_model(candidate, X_test, y_test)
+    print(f"{mode}: max PSI {psi.max():.3f}, fitted in {fit_time:.1f}s, "
+          f"{scoring} {metrics[scoring]:.4f} vs current {current_metrics[scoring]:.4f}")
+
+    state["trained_rows"] = len(ids)
+    version = None
+    if metrics[scoring] > current_metrics[scoring] + min_improvement:
+        metrics.update({
+            "retrain_mode": mode,
+            "parent_version": current_version,
+            "labelled_rows": int(len(ids)),
+            "max_psi": float(psi.max()),
+            "feedback_data_hash": hashlib.sha256(X_feedback.tobytes() + y_feedback.tobytes()).hexdigest(),
+        })
+        # training_data_hash stays the base dataset hash: it identifies the preprocessing later rounds build on
+        version = publish_model(candidate, artifact, metrics, training_data_hash=dataset_hash)
+        print(f"Published model version {version}")
+    else:
+        print(f"Candidate does not beat version {current_version}, not publishing")
+
+    save_feedback(directory, ids, X_feedback, y_feedback, state)
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrain the stroke model from labelled predictions in MongoDB")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per MongoDB batch")
+    parser.add_argument("--min-new-rows", type=int, default=50, help="Labelled rows needed before retraining")
+    parser.add_argument("--add-trees", type=int, default=20, help="Trees added per warm-start round")
+    parser.add_argument("--drift-threshold", type=float, default=0.2, help="Max feature PSI before a full refit")
+    parser.add_argument("--min-improvement", type=float, default=0.0, help="Holdout F1 gain required to publish")
+    parser.add_argument("--jobs", type=int, default=1, help="CPU cores used for fitting")
+    parser.add_argument("--force", action="store_true", help="Retrain even without enough new rows")
+    parser.add_argument("--loop", type=float, default=None, metavar="SECONDS",
+                        help="Keep running, retraining every SECONDS")
+    args = parser.parse_args()
+
+    # Run below the API's priority; the server picks up new versions through the registry
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+    while True:
+        try:
+            retrain_once(
+                batch_size=args.batch_size,
+                min_new_rows=args.min_new_rows,
+                add_trees=args.add_trees,
+                drift_threshold=args.drift_threshold,
+                min_improvement=args.min_improvement,
+                n_jobs=args.jobs,
+                force=args.force,
+            )
+        except Exception as e:
+            print("Error during retraining:", str(getattr(e, "detail", e)))
+        if args.loop is None:
+            break
+        time.sleep(args.loop)
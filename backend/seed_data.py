@@ -7,7 +7,7 @@ from sqlalchemy import text
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database.mySql_connection import db
+from database.mySql_connection import get_connection
 from database.mongodb_connection import stroke_collection
 
 def create_user(gender, age, row_id):
@@ -27,35 +27,35 @@ def create_user(gender, age, row_id):
         birth_year = current_year - int(age)
         dob = f"{birth_year}-01-01"
         
-        check_user_query = text("SELECT id FROM users WHERE email = :email")
-        existing_user = db.execute(check_user_query, {'email': email}).fetchone()
-        
-        if existing_user:
-            return existing_user.id
-        
-        insert_user_query = text("""
-            INSERT INTO users (name, email, password, role, phoneNumber, DOB, gender)
-            VALUES (:name, :email, :password, :role, :phoneNumber, :DOB, :gender)
-        """)
-        
-        result = db.execute(insert_user_query, {
-            'name': name,
-            'email': email,
-            'password': hashed_password,
-            'role': 'patient',
-            'phoneNumber': None,
-            'DOB': dob,
-            'gender': gender_mapped
-        })
-        db.commit()
-        
-        get_user_query = text("SELECT id FROM users WHERE email = :email")
-        user = db.execute(get_user_query, {'email': email}).fetchone()
-        
-        return user.id
+        with get_connection() as db:
+            check_user_query = text("SELECT id FROM users WHERE email = :email")
+            existing_user = db.execute(check_user_query, {'email': email}).fetchone()
+            
+            if existing_user:
+                return existing_user.id
+            
+            insert_user_query = text("""
+                INSERT INTO users (name, email, password, role, phoneNumber, DOB, gender)
+                VALUES (:name, :email, :password, :role, :phoneNumber, :DOB, :gender)
+            """)
+            
+            result = db.execute(insert_user_query, {
+                'name': name,
+                'email': email,
+                'password': hashed_password,
+                'role': 'patient',
+                'phoneNumber': None,
+                'DOB': dob,
+                'gender': gender_mapped
+            })
+            db.commit()
+            
+            get_user_query = text("SELECT id FROM users WHERE email = :email")
+            user = db.execute(get_user_query, {'email': email}).fetchone()
+            
+            return user.id
     
     except Exception as e:
-        db.rollback()
         print(f"Error creating user for row {row_id}: {e}")
         return None
 
@@ -1,11 +1,41 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from controller.auth import api as auth_api
-from controller.prediction import api as prediction_api
-from controller.dashboard import api as dashboard_api
+from controller.prediction import api as prediction_api, prediction_cache
+from controller.dashboard import api as dashboard_api, dashboard_cache, counts_cache
+from controller.model import model_holder
+from controller.batching import prediction_batcher
+from controller.inference_pool import inference_pool
+from controller.explain import explanation_cache
+from controller.user_directory import user_directory
+from controller.live_feed import live_feed
+from controller.jwt_auth import verify_token
+from database.mongodb_connection import ensure_indexes
+from database.mySql_connection import engine, pool_metrics
 import uvicorn
 
-app = FastAPI(title="Stroke Prediction API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm the stroke model and make sure the MongoDB indexes exist before serving requests"""
+    try:
+        model_holder.load()
+        model_holder.warm_up()
+    except FileNotFoundError as e:
+        print(f"Warning: {str(e)}")
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Warning: Failed to create MongoDB indexes: {str(e)}")
+    yield
+    live_feed.close()
+    await prediction_batcher.stop()
+    inference_pool.shutdown()
+    engine.dispose()
+
+
+app = FastAPI(title="Stroke Prediction API", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,6 +52,28 @@ async def health_check():
     """Health check endpoint"""
     return {'status': 'healthy', 'message': 'Server is running'}
 
+@app.get('/metrics')
+async def metrics(token_payload: dict = Depends(verify_token)):
+    """Runtime counters for the prediction pipeline (Doctor only)"""
+    if token_payload.get("role") != 'doctor':
+        raise HTTPException(
+            status_code=403,
+            detail="Only doctors can access this endpoint"
+        )
+
+    return {
+        'model_version': model_holder.version,
+        'batcher': prediction_batcher.stats(),
+        'inference_pool': inference_pool.stats(),
+        'prediction_cache': prediction_cache.stats(),
+        'explanation_cache': explanation_cache.stats(),
+        'user_directory': user_directory.stats(),
+        'dashboard_cache': dashboard_cache.stats(),
+        'dashboard_counts_cache': counts_cache.stats(),
+        'live_feed': live_feed.stats(),
+        'mysql_pool': pool_metrics.stats()
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "server:app",
@@ -0,0 +1,73 @@
+import os
+import sys
+import asyncio
+import threading
+import numpy as np
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.batching import PredictionBatcher
+
+
+class RecordingEngine:
+    """Predicts the first feature of every row and remembers each batch size"""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def predict_with_proba(self, X):
+        with self._lock:
+            self.batch_sizes.append(len(X))
+        return X[:, 0].astype(int), np.column_stack([1 - X[:, 1], X[:, 1]])
+
+
+class Bundle:
+    def __init__(self):
+        self.engine = RecordingEngine()
+
+
+def row(i):
+    return np.array([[i, i / 100]])
+
+
+def test_concurrent_calls_coalesce_into_bounded_batches():
+    bundle = Bundle()
+    batcher = PredictionBatcher(window_ms=50, max_batch_size=4)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.predict(bundle, row(i)) for i in range(10)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+
+    # Every caller gets its own row back, in request order
+    assert [int(prediction) for prediction, _ in results] == list(range(10))
+    assert [probabilities[1] for _, probabilities in results] == [i / 100 for i in range(10)]
+    assert sorted(bundle.engine.batch_sizes) == [2, 4, 4]
+    assert batcher.stats()["largest_batch"] == 4
+
+
+def test_stop_resolves_pending_calls():
+    """Rows still waiting for their window when the server stops are scored, not dropped."""
+    bundle = Bundle()
+    batcher = PredictionBatcher(window_ms=60_000, max_batch_size=2)
+
+    async def scenario():
+        calls = [asyncio.ensure_future(batcher.predict(bundle, row(i))) for i in range(5)]
+        # Two full batches are scored at once; the fifth row waits on the long window
+        await asyncio.sleep(0.01)
+        assert not calls[-1].done()
+        await batcher.stop()
+        # Without the drain the last call would never finish
+        results = await asyncio.wait_for(asyncio.gather(*calls), 1)
+        return [int(prediction) for prediction, _ in results]
+
+    assert asyncio.run(scenario()) == list(range(5))
+    assert sum(bundle.engine.batch_sizes) == 5
+    assert max(bundle.engine.batch_sizes) <= 2
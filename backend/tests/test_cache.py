@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.cache import TTLCache, canonical_key
+
+
+def test_canonical_key_ignores_dict_order():
+    """The same input in a different field order should hit the same entry."""
+    assert canonical_key("v1", {"age": 50.0, "gender": "Male"}) == canonical_key("v1", {"gender": "Male", "age": 50.0})
+    assert canonical_key("v1", {"age": 50.0}) != canonical_key("v2", {"age": 50.0})
+
+
+def test_cache_evicts_least_recently_used():
+    """Once full, the entry that was used longest ago is evicted first."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_entries_expire():
+    """Entries older than the TTL are treated as misses."""
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,69 @@
+import os
+import sys
+from contextlib import nullcontext
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+mongomock = pytest.importorskip("mongomock")
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import controller.dashboard as dashboard
+import controller.stroke_data_service as stroke_data_service
+from controller.jwt_auth import verify_token
+
+INPUT = {"gender": "Female", "age": 67.0, "hypertension": 0, "heart_disease": 1}
+
+
+def save_prediction(user_id):
+    return stroke_data_service.save_stroke_prediction(
+        user_id=user_id,
+        user_email=f"patient_{user_id}@example.com",
+        input_data=INPUT,
+        prediction=1,
+        probability=0.7,
+        risk_level="High",
+    )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """/dashboard on in-memory MongoDB collections, with the real summary counters"""
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(stroke_data_service, "stroke_collection", db.stroke_data)
+    monkeypatch.setattr(stroke_data_service, "summary_collection", db.stroke_summary)
+    monkeypatch.setattr(stroke_data_service, "patients_collection", db.stroke_patients)
+    monkeypatch.setattr(dashboard, "get_connection", nullcontext)
+    monkeypatch.setattr(dashboard.user_directory, "get_names", lambda db, user_ids: {})
+    dashboard.dashboard_cache.clear()
+
+    save_prediction(1)
+    app = FastAPI()
+    app.include_router(dashboard.api)
+    app.dependency_overrides[verify_token] = lambda: {"role": "doctor", "id": 1}
+    return TestClient(app)
+
+
+def test_etag_revalidation_until_a_new_prediction(client):
+    first = client.get("/dashboard/patients")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    not_modified = client.get("/dashboard/patients", headers={"If-None-Match": f"W/{etag}"})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    # The query string is part of the tag
+    assert client.get("/dashboard/patients?page_size=5", headers={"If-None-Match": etag}).status_code == 200
+
+    save_prediction(2)
+    changed = client.get("/dashboard/patients", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["total_predictions"] == 2
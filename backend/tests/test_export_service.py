@@ -0,0 +1,68 @@
+import os
+import sys
+import csv
+import io
+from datetime import datetime
+import pyarrow.parquet as pq
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.export_service import EXPORT_FIELDS, export_row, csv_text, csv_chunks, export_chunks
+
+
+DOCUMENT = {
+    "_id": "6650f0a1b2c3d4e5f6a7b8c9",
+    "user_id": 7,
+    "user_email": "patient@example.com",
+    "input_data": {"gender": "Female", "age": 67.0, "hypertension": 1, "work_type": "Private", "bmi": None},
+    "prediction": {"result": 1, "probability": 0.81, "risk_level": "High"},
+    "model_version": "20260101-000000",
+    "created_at": datetime(2026, 1, 2, 3, 4, 5),
+    "outcome": {"stroke": 1, "labelled_at": datetime(2026, 2, 1)},
+}
+
+
+def test_export_row_flattens_document():
+    row = export_row(DOCUMENT)
+    assert set(row) == set(EXPORT_FIELDS)
+    assert row["age"] == 67.0
+    assert row["risk_level"] == "High"
+    assert row["outcome_stroke"] == 1
+    # Fields missing from older documents are left empty
+    assert row["smoking_status"] is None
+    assert export_row({"_id": "x"})["outcome_labelled_at"] is None
+
+
+def test_csv_chunks_write_header_once():
+    """Batches concatenate into one CSV with a single header line."""
+    text = b"".join(csv_chunks([[DOCUMENT], [DOCUMENT, DOCUMENT]])).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 3
+    assert rows[0]["created_at"] == "2026-01-02T03:04:05"
+    assert rows[0]["bmi"] == ""
+    assert csv_text([DOCUMENT]).count("\n") == 1
+
+
+def test_resumed_csv_has_no_header():
+    text = b"".join(csv_chunks([[DOCUMENT]], header=False)).decode()
+    assert text.count("\n") == 1
+    assert text.startswith("6650f0a1b2c3d4e5f6a7b8c9,")
+
+
+def test_parquet_export_streams_one_readable_file():
+    """Every batch becomes a row group of a single file that pyarrow can read back."""
+    data = b"".join(export_chunks([[DOCUMENT], [DOCUMENT, DOCUMENT]], "parquet"))
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+    assert parquet_file.metadata.num_row_groups == 2
+
+    table = parquet_file.read()
+    assert table.column_names == EXPORT_FIELDS
+    assert table.num_rows == 3
+    row = table.to_pylist()[0]
+    assert row["created_at"] == datetime(2026, 1, 2, 3, 4, 5)
+    assert row["probability"] == 0.81
+    assert row["bmi"] is None
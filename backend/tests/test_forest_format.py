@@ -0,0 +1,61 @@
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.tree_engine import CompiledForest
+from controller.forest_format import write_forest, read_forest
+
+
+@pytest.fixture(scope="module")
+def forest():
+    X, y = make_classification(n_samples=500, n_features=8, random_state=1)
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=1).fit(X, y)
+    return model, X
+
+
+def test_compact_file_round_trip_matches_sklearn(forest, tmp_path):
+    """A forest read back from the compact file should predict exactly like sklearn."""
+    model, X = forest
+    path = str(tmp_path / "forest.bin")
+    write_forest(CompiledForest.from_sklearn(model), path)
+
+    loaded = read_forest(path)
+
+    assert loaded.threshold.dtype == np.float32
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_float32_thresholds_keep_ties_exact(forest):
+    """Rows sitting exactly on a split threshold must take the same branch."""
+    model, X = forest
+    full = CompiledForest.from_sklearn(model)
+    compact = full.compact()
+
+    internal = np.flatnonzero(full.left != np.arange(full.n_nodes))
+    X_ties = np.repeat(X[:1], len(internal), axis=0)
+    X_ties[np.arange(len(internal)), full.feature[internal]] = full.threshold[internal].astype(np.float32)
+
+    np.testing.assert_allclose(compact.predict_proba(X_ties), model.predict_proba(X_ties), rtol=0, atol=1e-12)
+
+
+def test_corrupt_file_is_rejected(forest, tmp_path):
+    """A flipped byte in the payload should fail the checksum."""
+    model, _ = forest
+    path = tmp_path / "forest.bin"
+    write_forest(CompiledForest.from_sklearn(model), str(path))
+
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="Checksum"):
+        read_forest(str(path))
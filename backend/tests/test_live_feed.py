@@ -0,0 +1,68 @@
+import os
+import sys
+import asyncio
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.live_feed import BroadcastHub, format_event
+
+
+def test_resume_replays_missed_events():
+    """A client reconnecting with Last-Event-ID gets exactly the events after it."""
+    async def scenario():
+        hub = BroadcastHub(buffer_size=10)
+        first = hub.publish("predictions", {"n": 1})
+        hub.publish("predictions", {"n": 2})
+        hub.publish("predictions", {"n": 3})
+
+        queue, backlog = hub.subscribe(first)
+        assert [event[3] for event in backlog] == ['{"n": 2}', '{"n": 3}']
+
+        hub.publish("predictions", {"n": 4})
+        await asyncio.sleep(0)
+        assert queue.get_nowait()[3] == '{"n": 4}'
+
+    asyncio.run(scenario())
+
+
+def test_unknown_or_evicted_event_id_resets_client():
+    """Ids from another process or older than the buffer ask the client to reload."""
+    async def scenario():
+        hub = BroadcastHub(buffer_size=2)
+        first = hub.publish("predictions", {})
+        for _ in range(3):
+            hub.publish("predictions", {})
+
+        for last_event_id in (first, "otherepoch-1", "garbage"):
+            _, backlog = hub.subscribe(last_event_id)
+            assert [event[2] for event in backlog] == ["reset"]
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_is_disconnected_without_blocking_others():
+    """A full queue ends that client's stream; other clients keep receiving."""
+    async def scenario():
+        hub = BroadcastHub(queue_size=2)
+        slow, _ = hub.subscribe()
+        fast, _ = hub.subscribe()
+
+        for n in range(3):
+            hub.publish("predictions", {"n": n})
+            await asyncio.sleep(0)
+            fast.get_nowait()
+
+        assert slow.get_nowait() is None
+        assert hub.stats()["subscribers"] == 1
+        assert hub.stats()["disconnected_slow_clients"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_format_event():
+    assert format_event((1, "abc-1", "predictions", "{}")) == "id: abc-1\nevent: predictions\ndata: {}\n\n"
+    assert format_event(BroadcastHub.reset_event()) == "event: reset\ndata: {}\n\n"
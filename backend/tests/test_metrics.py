@@ -0,0 +1,29 @@
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+# Make sure the backend root (where server.py lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.jwt_auth import verify_token
+from server import app
+
+
+def test_metrics_need_a_doctor_token():
+    client = TestClient(app)
+    assert client.get("/metrics").status_code in (401, 403)
+
+    try:
+        app.dependency_overrides[verify_token] = lambda: {"id": 1, "role": "patient"}
+        assert client.get("/metrics").status_code == 403
+
+        app.dependency_overrides[verify_token] = lambda: {"id": 2, "role": "doctor"}
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "mysql_pool" in response.json()
+    finally:
+        app.dependency_overrides.clear()
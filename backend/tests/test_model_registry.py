@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import controller.model as model_module
+from controller.model import ModelHolder
+from controller.model_registry import publish_model, load_version, get_current_version, set_current_version, list_versions, load_sklearn_model
+from controller.preprocess import fit_preprocessor, preprocess_data
+
+DATASET_PATH = os.path.join(BACKEND_ROOT, "dataset.csv")
+
+
+@pytest.fixture(scope="module")
+def training():
+    dataset = pd.read_csv(DATASET_PATH).head(500)
+    artifact = fit_preprocessor(dataset)
+    X, y = preprocess_data(dataset, artifact)
+    return artifact, X, y
+
+
+def train(training, seed):
+    _, X, y = training
+    return RandomForestClassifier(n_estimators=5, max_depth=4, random_state=seed).fit(X, y)
+
+
+def test_publish_and_load_round_trip(training, tmp_path):
+    artifact, X, _ = training
+    model = train(training, seed=0)
+    version = publish_model(model, artifact, {"f1_score": 0.5}, "hash", registry_dir=str(tmp_path))
+
+    assert get_current_version(str(tmp_path)) == version
+    engine, preprocessor, metadata = load_version(version, str(tmp_path))
+    assert metadata["training_data_hash"] == "hash"
+    assert preprocessor.feature_columns == list(artifact["feature_columns"])
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+    other = publish_model(train(training, seed=1), artifact, {}, "hash", registry_dir=str(tmp_path), make_current=False)
+    assert get_current_version(str(tmp_path)) == version
+    assert {entry["version"] for entry in list_versions(str(tmp_path))} == {version, other}
+
+
+def test_swap_keeps_serving_the_old_bundle_while_loading(training, tmp_path, monkeypatch):
+    artifact, _, _ = training
+    registry_dir = str(tmp_path)
+    first = publish_model(train(training, seed=0), artifact, {}, "hash", registry_dir=registry_dir)
+    second = publish_model(train(training, seed=1), artifact, {}, "hash", registry_dir=registry_dir, make_current=False)
+
+    holder = ModelHolder(model_path=str(tmp_path / "none.pkl"), registry_dir=registry_dir, check_interval=3600)
+    swaps = []
+    holder.add_swap_listener(lambda bundle: swaps.append(bundle.version))
+    old_bundle = holder.get()
+    assert old_bundle.version == first
+
+    # Hold the load of the new version until the test has looked at what is served meanwhile
+    loading, release = threading.Event(), threading.Event()
+    def slow_load_version(version, registry_dir):
+        loading.set()
+        release.wait(5)
+        return load_version(version, registry_dir)
+    monkeypatch.setattr(model_module, "load_version", slow_load_version)
+
+    set_current_version(second, registry_dir)
+    reloader = threading.Thread(target=holder.reload_if_changed)
+    reloader.start()
+    assert loading.wait(5)
+    assert holder.get() is old_bundle
+
+    release.set()
+    reloader.join(5)
+    assert holder.get().version == second
+    assert swaps == [first, second]
+
+
+def test_model_fitted_on_a_dataframe_takes_numpy_rows(training, tmp_path):
+    artifact, X, y = training
+    columns = list(artifact["feature_columns"])
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(pd.DataFrame(X, columns=columns), y)
+    version = publish_model(model, artifact, {}, "hash", registry_dir=str(tmp_path))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        load_sklearn_model(version, str(tmp_path)).predict_proba(X[:3])
+
+    renamed = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(pd.DataFrame(X, columns=columns[::-1]), y)
+    with pytest.raises(ValueError):
+        publish_model(renamed, artifact, {}, "hash", registry_dir=str(tmp_path))
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Make sure the backend root (where database/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import database.mySql_connection as mysql
+
+
+@pytest.fixture
+def pooled_engine(tmp_path, monkeypatch):
+    """A small SQLite QueuePool standing in for MySQL"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'users.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    monkeypatch.setattr(mysql, "engine", engine)
+    monkeypatch.setattr(mysql, "pool_metrics", mysql.PoolMetrics())
+    with engine.connect() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.commit()
+    yield engine
+    engine.dispose()
+
+
+def test_uncommitted_work_is_rolled_back_on_return(pooled_engine):
+    """A request that fails before committing leaves nothing behind for the next one."""
+    with pytest.raises(RuntimeError):
+        with mysql.get_connection() as db:
+            db.execute(text("INSERT INTO users (name) VALUES ('half done')"))
+            raise RuntimeError("request failed")
+
+    with mysql.get_connection() as db:
+        assert db.execute(text("SELECT COUNT(*) FROM users")).scalar() == 0
+
+
+def test_checkouts_and_timeouts_are_counted(pooled_engine):
+    with mysql.get_connection():
+        with pytest.raises(PoolTimeoutError):
+            with mysql.get_connection():
+                pass
+
+    stats = mysql.pool_metrics.stats()
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["checked_out"] == 0
+
+
+def test_exhausted_pool_is_a_503(pooled_engine):
+    with mysql.get_connection():
+        with pytest.raises(HTTPException) as error:
+            next(mysql.get_db())
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
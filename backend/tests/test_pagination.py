@@ -0,0 +1,100 @@
+import os
+import sys
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+mongomock = pytest.importorskip("mongomock")
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import controller.dashboard as dashboard
+import controller.stroke_data_service as stroke_data_service
+from controller.jwt_auth import verify_token
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    """23 predictions over 5 timestamps, so most pages end in the middle of a created_at tie"""
+    collection = mongomock.MongoClient().db.stroke_data
+    collection.insert_many([
+        {
+            "_id": ObjectId(),
+            "user_id": i,
+            "user_email": f"patient_{i}@example.com",
+            "input_data": {"age": 50},
+            "prediction": {"result": 0, "probability": 0.1, "risk_level": "Low"},
+            "created_at": START + timedelta(minutes=i % 5),
+        }
+        for i in range(23)
+    ])
+    monkeypatch.setattr(stroke_data_service, "stroke_collection", collection)
+    return collection
+
+
+def newest_first(collection):
+    documents = collection.find().sort([("created_at", -1), ("_id", -1)])
+    return [str(document["_id"]) for document in documents]
+
+
+def test_cursor_pages_cover_every_document_once(collection):
+    seen = []
+    cursor = None
+    while True:
+        documents, cursor = stroke_data_service.get_stroke_predictions_page(4, cursor=cursor)
+        seen.extend(document["_id"] for document in documents)
+        if cursor is None:
+            break
+
+    assert len(documents) == 3
+    assert seen == newest_first(collection)
+
+
+def test_invalid_cursor_is_a_400(collection):
+    for cursor in ["not base64!", "bm90IGpzb24", stroke_data_service.encode_cursor({"created_at": START, "_id": "x"})]:
+        with pytest.raises(HTTPException) as error:
+            stroke_data_service.get_stroke_predictions_page(4, cursor=cursor)
+        assert error.value.status_code == 400
+
+
+@pytest.fixture
+def client(collection, monkeypatch):
+    monkeypatch.setattr(dashboard, "get_stroke_summary", lambda: {
+        "version": collection.count_documents({}),
+        "total_predictions": 23,
+        "total_patients": 23,
+        "high_risk_count": 0,
+        "moderate_risk_count": 0,
+        "low_risk_count": 23,
+    })
+    # User names come from MySQL; pages without them are enough here
+    monkeypatch.setattr(dashboard, "get_connection", nullcontext)
+    monkeypatch.setattr(dashboard.user_directory, "get_names", lambda db, user_ids: {})
+    dashboard.dashboard_cache.clear()
+    app = FastAPI()
+    app.include_router(dashboard.api)
+    app.dependency_overrides[verify_token] = lambda: {"role": "doctor", "id": 1}
+    return TestClient(app)
+
+
+def test_patients_page_and_cursor_modes(collection, client):
+    page = client.get("/dashboard/patients", params={"page": 2, "page_size": 10}).json()
+    assert (page["current_page"], page["total_pages"], page["has_prev"], page["has_next"]) == (2, 3, True, True)
+    assert [p["prediction_id"] for p in page["predictions"]] == newest_first(collection)[10:20]
+
+    # With a cursor the position is unknown, so current_page and has_prev are null
+    following = client.get("/dashboard/patients", params={"cursor": page["next_cursor"], "page_size": 10}).json()
+    assert following["current_page"] is None and following["has_prev"] is None
+    assert following["has_next"] is False and following["next_cursor"] is None
+    assert [p["prediction_id"] for p in following["predictions"]] == newest_first(collection)[20:]
+
+    assert client.get("/dashboard/patients", params={"cursor": "garbage"}).status_code == 400
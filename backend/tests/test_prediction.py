@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import controller.prediction as prediction
+from controller.model import ModelBundle
+from controller.jwt_auth import verify_token
+from controller.preprocess import FEATURE_COLUMNS, FittedPreprocessor, fit_preprocessor, preprocess_data
+
+DATASET_PATH = os.path.join(BACKEND_ROOT, "dataset.csv")
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return pd.read_csv(DATASET_PATH).head(500)
+
+
+@pytest.fixture(scope="module")
+def bundle(dataset):
+    """A small forest trained on the first rows of dataset.csv"""
+    artifact = fit_preprocessor(dataset)
+    X, y = preprocess_data(dataset, artifact)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    return ModelBundle.from_sklearn(model, FittedPreprocessor.from_artifact(artifact), "test")
+
+
+def test_uploaded_rows_out_of_range_are_rejected_and_not_saved(dataset, bundle, monkeypatch):
+    saved = []
+    monkeypatch.setattr(prediction, "save_stroke_predictions", saved.extend)
+
+    chunk = dataset.head(4).copy()
+    chunk.loc[1, "age"] = -5
+    chunk.loc[2, "hypertension"] = 7
+    chunk.loc[3, "avg_glucose_level"] = None
+
+    lines = prediction.score_chunks(chunk, iter([]), bundle, "ndjson", True, {"id": 1, "email": "p@example.com"})
+    rows = [json.loads(line) for line in "".join(lines).splitlines()]
+
+    assert rows[0]["error"] is None and rows[0]["risk_level"] is not None
+    assert rows[1]["error"] == "age: Input should be greater than or equal to 0"
+    assert rows[2]["error"] == "hypertension: Input should be less than or equal to 1"
+    assert rows[3]["error"] == "avg_glucose_level: Field required"
+    assert all(row["prediction"] is None for row in rows[1:])
+    assert [document["input_data"]["age"] for document in saved] == [chunk.loc[0, "age"]]
+
+
+def test_validate_chunk_allows_missing_bmi(dataset):
+    chunk = dataset.head(2)[FEATURE_COLUMNS].copy()
+    chunk["bmi"] = [None, 101]
+    chunk["heart_disease"] = [0.5, 0]
+    assert prediction.validate_chunk(chunk) == [
+        "heart_disease: Input should be a valid integer",
+        "bmi: Input should be less than or equal to 100",
+    ]
+
+
+@pytest.fixture
+def client(bundle, monkeypatch):
+    saved = []
+    monkeypatch.setattr(prediction.model_holder, "get", lambda: bundle)
+    monkeypatch.setattr(prediction, "save_stroke_predictions", saved.extend)
+    app = FastAPI()
+    app.include_router(prediction.api)
+    app.dependency_overrides[verify_token] = lambda: {"role": "patient", "id": 7, "email": "p@example.com"}
+    client = TestClient(app)
+    client.saved = saved
+    return client
+
+
+def test_predict_batch_keeps_order_and_reports_bad_rows(dataset, bundle, client):
+    records = dataset.head(6)[FEATURE_COLUMNS].astype(object)
+    records = records.where(records.notna(), None).to_dict("records")
+    records[2] = {**records[2], "age": -1}
+    records[4] = {**records[4], "gender": "Robot"}
+
+    response = client.post("/prediction/predict-batch", json={"records": records})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["success"], body["total"], body["succeeded"], body["failed"]) == (True, 6, 4, 2)
+
+    results = body["results"]
+    assert [result["index"] for result in results] == list(range(6))
+    assert results[2]["success"] is False and results[2]["error"].startswith("age:")
+    assert results[4]["success"] is False and "Unknown value 'Robot' for gender" in results[4]["error"]
+
+    # Each good row gets the probability it would get on its own
+    X, _ = bundle.preprocessor.transform_records(records)
+    _, probabilities = bundle.engine.predict_with_proba(X)
+    for i in (0, 1, 3, 5):
+        assert results[i]["success"] is True
+        assert results[i]["probability"] == pytest.approx(probabilities[i][1])
+    assert [document["input_data"]["age"] for document in client.saved] == [records[i]["age"] for i in (0, 1, 3, 5)]
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.preprocess import FEATURE_COLUMNS, FittedPreprocessor, fit_preprocessor, preprocess_data, read_dataset
+
+DATASET_PATH = os.path.join(BACKEND_ROOT, "dataset.csv")
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return pd.read_csv(DATASET_PATH).head(500)
+
+
+def test_transform_request_matches_training(dataset):
+    """Inference-time rows should equal the rows the model was trained on."""
+    artifact = fit_preprocessor(dataset)
+    preprocessor = FittedPreprocessor.from_artifact(artifact)
+
+    X = dataset[FEATURE_COLUMNS].copy()
+    X["bmi"] = pd.to_numeric(X["bmi"].replace("N/A", np.nan), errors="coerce")
+    for col, le in artifact["label_encoders"].items():
+        X[col] = le.transform(X[col].astype(str))
+    expected = artifact["scaler"].transform(artifact["imputer"].transform(X))
+
+    for i, record in enumerate(dataset.to_dict("records")):
+        row = preprocessor.transform_request(record)
+        np.testing.assert_allclose(row[0], expected[i], rtol=1e-9, atol=1e-12)
+
+
+def test_transform_request_rejects_unknown_category(dataset):
+    """Categories never seen in training should be reported, not silently encoded."""
+    preprocessor = FittedPreprocessor.from_artifact(fit_preprocessor(dataset))
+    record = dataset.iloc[0].to_dict()
+    record["work_type"] = "Astronaut"
+    with pytest.raises(ValueError, match="work_type"):
+        preprocessor.transform_request(record)
+
+
+def test_read_dataset_matches_default_parsing(dataset):
+    """Typed CSV loading should give the same training arrays as plain read_csv."""
+    typed = read_dataset(DATASET_PATH).head(500)
+    artifact = fit_preprocessor(dataset)
+
+    X_expected, y_expected = preprocess_data(dataset, artifact)
+    X, y = preprocess_data(typed, fit_preprocessor(typed))
+
+    np.testing.assert_allclose(X, X_expected, rtol=1e-12)
+    np.testing.assert_array_equal(y, y_expected)
+
+
+def test_preprocessor_dict_round_trip(dataset):
+    """The JSON form kept in the model registry should transform exactly like the original."""
+    preprocessor = FittedPreprocessor.from_artifact(fit_preprocessor(dataset))
+    restored = FittedPreprocessor.from_dict(json.loads(json.dumps(preprocessor.to_dict())))
+
+    records = dataset.head(50).to_dict("records")
+    np.testing.assert_array_equal(restored.transform_records(records)[0], preprocessor.transform_records(records)[0])
@@ -0,0 +1,32 @@
+import os
+import sys
+import numpy as np
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from retrain_model import holdout_mask, population_stability
+
+
+def test_population_stability_flags_shifted_features():
+    """A shifted feature should have a large PSI, an unchanged one a small PSI."""
+    rng = np.random.default_rng(0)
+    expected = rng.normal(size=(5000, 2))
+    actual = np.column_stack([rng.normal(size=2000), rng.normal(loc=1.5, size=2000)])
+
+    psi = population_stability(expected, actual)
+
+    assert psi[0] < 0.05
+    assert psi[1] > 0.2
+
+
+def test_holdout_mask_is_stable():
+    """A document should stay in the same split as more documents arrive."""
+    ids = [f"{i:024x}" for i in range(1000)]
+    mask = holdout_mask(ids)
+
+    np.testing.assert_array_equal(holdout_mask(ids[:400]), mask[:400])
+    assert 0.1 < mask.mean() < 0.3
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import controller.jwt_auth as jwt_auth
+from controller.dashboard import api
+
+
+@pytest.fixture(autouse=True)
+def secret_key(monkeypatch):
+    monkeypatch.setenv("secret_key", "test-secret-with-at-least-32-bytes")
+
+
+def test_ticket_only_opens_the_stream():
+    ticket = jwt_auth.issue_stream_ticket({"id": 2, "role": "doctor"})
+
+    payload = jwt_auth.verify_stream_ticket(ticket)
+    assert payload["role"] == "doctor" and payload["scope"] == "live"
+    with pytest.raises(HTTPException) as error:
+        jwt_auth.decode_token(ticket)
+    assert error.value.status_code == 401
+
+
+def test_session_token_and_expired_ticket_cannot_open_the_stream(monkeypatch):
+    session = jwt_auth.jwt.encode({"id": 2, "role": "doctor"}, "test-secret-with-at-least-32-bytes", algorithm="HS256")
+    with pytest.raises(HTTPException):
+        jwt_auth.verify_stream_ticket(session)
+
+    monkeypatch.setattr(jwt_auth, "STREAM_TICKET_SECONDS", -1)
+    with pytest.raises(HTTPException) as error:
+        jwt_auth.verify_stream_ticket(jwt_auth.issue_stream_ticket({"id": 2, "role": "doctor"}))
+    assert error.value.detail == "Token has expired"
+
+
+def test_ticket_endpoint_is_for_doctors():
+    app = FastAPI()
+    app.include_router(api)
+    client = TestClient(app)
+
+    app.dependency_overrides[jwt_auth.verify_token] = lambda: {"id": 1, "role": "patient"}
+    assert client.post("/dashboard/live/ticket").status_code == 403
+
+    app.dependency_overrides[jwt_auth.verify_token] = lambda: {"id": 2, "role": "doctor"}
+    response = client.post("/dashboard/live/ticket")
+    assert response.status_code == 200
+    assert jwt_auth.verify_stream_ticket(response.json()["ticket"])["id"] == 2
@@ -0,0 +1,74 @@
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.tree_engine import CompiledForest
+
+
+def make_forest(max_depth):
+    X, y = make_classification(n_samples=600, n_features=10, random_state=0)
+    # Coarse values make many rows fall exactly on split thresholds
+    X = np.round(X, 1)
+    forest = RandomForestClassifier(n_estimators=25, max_depth=max_depth, random_state=0)
+    forest.fit(X, y)
+    return forest, X
+
+
+@pytest.mark.parametrize("max_depth", [3, 10, None])
+def test_compiled_forest_matches_sklearn(max_depth):
+    """Compiled probabilities and classes should match sklearn exactly."""
+    forest, X = make_forest(max_depth)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    predictions, proba = compiled.predict_with_proba(X)
+
+    np.testing.assert_allclose(proba, forest.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(predictions, forest.predict(X))
+
+
+def test_compiled_forest_single_row():
+    """A single 1-D row should give the same answer as the batch path."""
+    forest, X = make_forest(8)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    np.testing.assert_allclose(compiled.predict_proba(X[5]), forest.predict_proba(X[5:6]), atol=1e-12)
+
+
+def test_contributions_add_up_to_probability():
+    """Bias plus contributions should reproduce the probability, also in the compact form."""
+    forest, X = make_forest(8)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    for engine in (compiled, compiled.compact()):
+        bias, contributions = engine.contributions(X[:50], class_index=1)
+        np.testing.assert_allclose(bias + contributions.sum(axis=1), forest.predict_proba(X[:50])[:, 1], atol=1e-9)
+
+
+def test_contributions_match_path_walk():
+    """Vectorised contributions should equal a plain walk down each tree."""
+    forest, X = make_forest(5)
+    compiled = CompiledForest.from_sklearn(forest)
+    row = X[7]
+
+    expected = np.zeros(X.shape[1])
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1)
+        node = 0
+        while tree.children_left[node] >= 0:
+            child = tree.children_left[node] if row[tree.feature[node]] <= tree.threshold[node] else tree.children_right[node]
+            expected[tree.feature[node]] += value[child] - value[node]
+            node = child
+    expected /= len(forest.estimators_)
+
+    _, contributions = compiled.contributions(row, class_index=1)
+    np.testing.assert_allclose(contributions[0], expected, atol=1e-12)
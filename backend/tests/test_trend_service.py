@@ -0,0 +1,35 @@
+import os
+import sys
+from datetime import datetime
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+from controller.trend_service import bucket_start, age_band, trend_slice
+
+
+def test_bucket_start():
+    """Buckets start at midnight, on Monday for weeks and on the 1st for months."""
+    created_at = datetime(2026, 10, 18, 15, 42, 7, 123)  # a Sunday
+    assert bucket_start(created_at, "day") == datetime(2026, 10, 18)
+    assert bucket_start(created_at, "week") == datetime(2026, 10, 12)
+    assert bucket_start(created_at, "month") == datetime(2026, 10, 1)
+    assert bucket_start(datetime(2026, 10, 12), "week") == datetime(2026, 10, 12)
+
+
+def test_age_band_edges():
+    assert age_band(0.5) == "0-17"
+    assert age_band(17.9) == "0-17"
+    assert age_band(18) == "18-39"
+    assert age_band(59) == "40-59"
+    assert age_band(80) == "80+"
+    assert age_band(None) == "Unknown"
+
+
+def test_trend_slice_fills_missing_values():
+    document = {"input_data": {"gender": "Female", "age": 67, "work_type": None}}
+    assert trend_slice(document) == {"gender": "Female", "age_band": "60-79", "work_type": "Unknown"}
+    assert trend_slice({"input_data": {"gender": ""}})["gender"] == "Unknown"
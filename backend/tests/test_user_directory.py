@@ -0,0 +1,62 @@
+import os
+import sys
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+
+# Make sure the backend root (where controller/ lives) is on sys.path
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+
+import controller.user_directory as user_directory_module
+from controller.user_directory import UserDirectory
+
+
+def make_db(n_users):
+    engine = create_engine("sqlite://")
+    connection = engine.connect()
+    connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+    connection.execute(text("INSERT INTO users VALUES " + ", ".join(f"({i}, 'User {i}')" for i in range(1, n_users + 1))))
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return connection, statements
+
+
+def test_names_are_fetched_once_with_fixed_statements():
+    """Misses should be fetched in padded chunks and then served from the cache."""
+    db, statements = make_db(300)
+    directory = UserDirectory()
+
+    names = directory.get_names(db, list(range(1, 301)))
+    assert names[42] == "User 42" and len(names) == 300
+    assert len(statements) == 3 and len(set(statements)) == 1
+
+    directory.get_names(db, [1, 2, 3])
+    assert len(statements) == 3
+
+
+def test_signup_invalidates_unknown_ids():
+    """An id that was missing should be looked up again after a signup."""
+    db, _ = make_db(5)
+    directory = UserDirectory()
+
+    assert directory.get_names(db, [6]) == {}
+    db.execute(text("INSERT INTO users VALUES (6, 'New User')"))
+    assert directory.get_names(db, [6]) == {}
+
+    directory.invalidate()
+    assert directory.get_names(db, [6]) == {6: "New User"}
+
+
+def test_name_prefix_matching_too_many_users_is_rejected(monkeypatch):
+    """A broad prefix must not silently filter on a truncated list of users."""
+    db, _ = make_db(20)
+    monkeypatch.setattr(user_directory_module, "NAME_MATCH_LIMIT", 11)
+    directory = UserDirectory()
+
+    assert directory.find_ids_by_name_prefix(db, "User 1") == [1] + list(range(10, 20))
+    with pytest.raises(HTTPException) as error:
+        directory.find_ids_by_name_prefix(db, "User")
+    assert error.value.status_code == 400
@@ -1,5 +1,7 @@
 import os
-import pandas as pd
+import time
+import argparse
+import numpy as np
 import joblib
 
 from sklearn.ensemble import RandomForestClassifier
@@ -13,21 +15,56 @@ from sklearn.metrics import (
 )
 from imblearn.over_sampling import SMOTE
 
-from controller.preprocess import preprocess_data
+from controller.preprocess import fit_preprocessor, preprocess_data, read_dataset, save_preprocessor, PREPROCESSOR_PATH
+from controller.model import file_checksum
+from controller.model_registry import publish_model, version_dir, REGISTRY_DIR, FOREST_FILE
+from controller.forest_format import read_forest
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_PATH = os.path.join(BASE_DIR, "dataset.csv")
-PREPROCESSED_PATH = os.path.join(BASE_DIR, "preprocessed_data.csv")
+DATASET_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "dataset")
 MODEL_PATH = os.path.join(BASE_DIR, "stroke_model.pkl")
 METRICS_PATH = os.path.join(BASE_DIR, "model_metrics.txt")
 
+DEFAULT_PARAMS = {
+    "max_depth": 10,
+    "min_samples_split": 5,
+    "min_samples_leaf": 2,
+}
 
-def load_preprocessed_data():
-    df = pd.read_csv(PREPROCESSED_PATH)
 
-    X = df.drop("stroke", axis=1)
-    y = df["stroke"]
+def load_training_data(dataset_path=DATASET_PATH, cache_dir=DATASET_CACHE_DIR):
+    """
+    Read and preprocess the dataset into arrays. The result is cached as .npy
+    keyed by the dataset's sha256, so a rerun on an unchanged file skips CSV
+    parsing and preprocessing entirely.
 
+    Returns:
+        tuple: (X, y, fitted preprocessor artifact, dataset hash)
+    """
+    dataset_hash = file_checksum(dataset_path)
+    cache = os.path.join(cache_dir, dataset_hash[:16])
+    X_path = os.path.join(cache, "X.npy")
+    y_path = os.path.join(cache, "y.npy")
+    preprocessor_path = os.path.join(cache, "preprocessor.pkl")
+
+    if os.path.exists(preprocessor_path):
+        return np.load(X_path), np.load(y_path), joblib.load(preprocessor_path), dataset_hash
+
+    df = read_dataset(dataset_path)
+    preprocessor = fit_preprocessor(df)
+    X, y = preprocess_data(df, preprocessor)
+
+    # The preprocessor is written last and marks the cache entry as complete
+    os.makedirs(cache, exist_ok=True)
+    np.save(X_path, X)
+    np.save(y_path, y)
+    joblib.dump(preprocessor, preprocessor_path)
+
+    return X, y, preprocessor, dataset_hash
+
+
+def split_training_data(X, y):
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
@@ -35,20 +72,15 @@ def load_preprocessed_data():
     smote = SMOTE(random_state=42)
     X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
 
-    X_train_resampled = pd.DataFrame(X_train_resampled, columns=X_train.columns)
-    y_train_resampled = pd.Series(y_train_resampled)
-
     return X_train_resampled, X_test, y_train_resampled, y_test
 
 
-def train_random_forest(X_train, y_train, n_estimators=100, random_state=42):
+def train_random_forest(X_train, y_train, n_estimators=100, random_state=42, **params):
     rf_model = RandomForestClassifier(
         n_estimators=n_estimators,
         random_state=random_state,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
         n_jobs=-1,
+        **{**DEFAULT_PARAMS, **params},
     )
     rf_model.fit(X_train, y_train)
     return rf_model
@@ -73,23 +105,53 @@ def evaluate_model(model, X_test, y_test):
     return metrics
 
 
-def main():
+def measure_artifacts(forest_path):
+    """Size and load time of the compact forest file next to the pickled model"""
+    start = time.perf_counter()
+    read_forest(forest_path)
+    forest_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    joblib.load(MODEL_PATH)
+    pickle_load = time.perf_counter() - start
+
+    return {
+        "forest_bytes": os.path.getsize(forest_path),
+        "forest_load_ms": forest_load * 1000,
+        "pickle_bytes": os.path.getsize(MODEL_PATH),
+        "pickle_load_ms": pickle_load * 1000,
+    }
+
+
+def main(params=None):
+    params = dict(params or {})
+    n_estimators = params.pop("n_estimators", 100)
     try:
-        # 1. preprocess
-        df = pd.read_csv(DATASET_PATH)
-        preprocess_data(df)
+        # 1. preprocess (cached per dataset version)
+        X, y, preprocessor, dataset_hash = load_training_data()
 
-        # 2. load preprocessed and train
-        X_train, X_test, y_train, y_test = load_preprocessed_data()
-        model = train_random_forest(X_train, y_train, n_estimators=100)
+        # 2. split, oversample and train
+        X_train, X_test, y_train, y_test = split_training_data(X, y)
+        model = train_random_forest(X_train, y_train, n_estimators=n_estimators, **params)
 
         # 3. evaluate
         metrics = evaluate_model(model, X_test, y_test)
 
-        # 4. save model
+        # 4. save model and the fitted preprocessing next to it
         joblib.dump(model, MODEL_PATH)
+        save_preprocessor(preprocessor, PREPROCESSOR_PATH)
+
+        # 5. publish a new registry version (served from memory-mapped arrays)
+        version = publish_model(
+            model,
+            preprocessor,
+            metrics,
+            training_data_hash=dataset_hash,
+        )
+
+        artifacts = measure_artifacts(os.path.join(version_dir(version), FOREST_FILE))
 
-        # 5. write metrics
+        # 6. write metrics
         with open(METRICS_PATH, "w") as f:
             f.write("Random Forest Model Evaluation Metrics\n")
             f.write("=" * 60 + "\n\n")
@@ -97,13 +159,79 @@ def main():
             f.write(f"Precision: {metrics['precision']:.4f}\n")
             f.write(f"Recall:    {metrics['recall']:.4f}\n")
             f.write(f"F1-Score:  {metrics['f1_score']:.4f}\n")
+            f.write("\nModel Artifacts\n")
+            f.write("=" * 60 + "\n\n")
+            f.write(f"Version:      {version}\n")
+            f.write(f"{FOREST_FILE}:   {artifacts['forest_bytes'] / 1024:.1f} KB, loads in {artifacts['forest_load_ms']:.2f} ms\n")
+            f.write(f"Pickle:       {artifacts['pickle_bytes'] / 1024:.1f} KB, loads in {artifacts['pickle_load_ms']:.2f} ms\n")
 
         print("Model trained and saved to:", MODEL_PATH)
+        print("Preprocessor saved to:", PREPROCESSOR_PATH)
+        print(f"Published model version {version} to: {REGISTRY_DIR}")
         print("Metrics written to:", METRICS_PATH)
 
     except Exception as e:
         print("Error during training:", str(e))
 
 
+def search(mode="random", n_iter=20, folds=5, workers=None, scoring="f1", early_stop_ratio=0.9, refit=False):
+    """
+    Hyperparameter search: stratified k-fold CV with SMOTE inside each fold,
+    spread over a process pool. Writes a ranked leaderboard and, with
+    refit=True, trains and publishes the best candidate.
+    """
+    from model_search import grid_candidates, random_candidates, run_search, write_leaderboard
+
+    X, y, _, _ = load_training_data()
+
+    # Search on the training part only; the test split stays unseen for the final evaluation
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    candidates = grid_candidates() if mode == "grid" else random_candidates(n_iter)
+    print(f"Evaluating {len(candidates)} candidates with {folds}-fold CV")
+    results = run_search(
+        X_train,
+        y_train,
+        candidates,
+        n_folds=folds,
+        workers=workers,
+        scoring=scoring,
+        early_stop_ratio=early_stop_ratio,
+    )
+    path = write_leaderboard(results)
+
+    print("Leaderboard written to:", path)
+    for rank, result in enumerate(results[:5], start=1):
+        print(f"{rank}. {scoring}={result['score']:.4f} recall={result['mean_recall']:.4f} "
+              f"fit={result['fit_time_s']:.2f}s latency={result['inference_latency_us']:.0f}us {result['params']}")
+
+    if refit and results:
+        main(results[0]["params"])
+
+    return results
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the stroke prediction model")
+    parser.add_argument("--search", choices=["grid", "random"], help="Run a hyperparameter search instead of a single fit")
+    parser.add_argument("--n-iter", type=int, default=20, help="Candidates to sample in random search")
+    parser.add_argument("--folds", type=int, default=5, help="Number of stratified CV folds")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument("--scoring", choices=["f1", "recall", "precision"], default="f1")
+    parser.add_argument("--early-stop", type=float, default=0.9,
+                        help="Stop a candidate after 2 folds if below this fraction of the best score (0 disables)")
+    parser.add_argument("--refit", action="store_true", help="Train and publish the best candidate after the search")
+    args = parser.parse_args()
+
+    if args.search:
+        search(
+            mode=args.search,
+            n_iter=args.n_iter,
+            folds=args.folds,
+            workers=args.workers,
+            scoring=args.scoring,
+            early_stop_ratio=args.early_stop or None,
+            refit=args.refit,
+        )
+    else:
+        main()
@@ -7,10 +7,13 @@ const API_CONFIG = {
             SIGNIN: '/auth/signin'
         },
         PREDICTION: {
-            PREDICT: '/prediction/predict'
+            PREDICT: '/prediction/predict',
+            HISTORY: '/prediction/history'
         },
         DASHBOARD: {
-            PATIENTS: '/dashboard/patients'
+            PATIENTS: '/dashboard/patients',
+            LIVE: '/dashboard/live',
+            LIVE_TICKET: '/dashboard/live/ticket'
         },
         HEALTH: '/health'
     }
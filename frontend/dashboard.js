@@ -1,6 +1,12 @@
 let currentPage = 1;
 const pageSize = 10;
 let paginationData = {};
+// Server-side filters from the search box (risk_level, email or name)
+let currentFilters = {};
+// Server-Sent Events stream of new predictions
+let liveFeed = null;
+// Id of the last live event received, to resume from after reopening the stream
+let lastLiveEventId = null;
 
 document.addEventListener('DOMContentLoaded', function () {
     checkAuthentication();
@@ -9,6 +15,7 @@ document.addEventListener('DOMContentLoaded', function () {
     setupPagination();
     setupSearch();
     setupRefresh();
+    connectLiveFeed();
 });
 
 /**
@@ -65,6 +72,7 @@ function setupLogout() {
     const logoutBtn = document.getElementById('logoutBtn');
     if (logoutBtn) {
         logoutBtn.addEventListener('click', function () {
+            if (liveFeed) liveFeed.close();
             localStorage.removeItem('user');
             showNotification('Logged out successfully', 'success');
             setTimeout(() => {
@@ -88,7 +96,8 @@ async function loadPatientData(page = 1) {
     currentPage = page;
 
     try {
-        const url = `${getApiUrl(API_CONFIG.ENDPOINTS.DASHBOARD.PATIENTS)}?page=${page}&page_size=${pageSize}`;
+        const params = new URLSearchParams({ page, page_size: pageSize, ...currentFilters });
+        const url = `${getApiUrl(API_CONFIG.ENDPOINTS.DASHBOARD.PATIENTS)}?${params}`;
         const response = await apiCall(url);
 
         if (response.success && response.data.success) {
@@ -121,6 +130,62 @@ async function loadPatientData(page = 1) {
     }
 }
 
+/**
+ * Keep the dashboard current without polling: the server pushes every new
+ * prediction with the updated totals. EventSource reconnects on its own and
+ * sends Last-Event-ID, so missed events are replayed (or a reset is sent).
+ * EventSource cannot send an Authorization header, so the stream is opened
+ * with a short-lived ticket instead of the session token; once the ticket has
+ * expired a reconnect is refused and a new ticket is fetched.
+ */
+async function connectLiveFeed() {
+    if (!getAuthToken() || typeof EventSource === 'undefined') return;
+
+    const response = await apiCall(getApiUrl(API_CONFIG.ENDPOINTS.DASHBOARD.LIVE_TICKET), { method: 'POST' });
+    if (!response.success || !response.data.success) return;
+
+    const params = new URLSearchParams({ ticket: response.data.ticket });
+    if (lastLiveEventId) params.set('last_event_id', lastLiveEventId);
+    liveFeed = new EventSource(`${getApiUrl(API_CONFIG.ENDPOINTS.DASHBOARD.LIVE)}?${params}`);
+
+    liveFeed.addEventListener('error', function () {
+        if (liveFeed.readyState === EventSource.CLOSED && getAuthToken()) {
+            setTimeout(connectLiveFeed, 3000);
+        }
+    });
+
+    liveFeed.addEventListener('predictions', function (event) {
+        lastLiveEventId = event.lastEventId || lastLiveEventId;
+        const data = JSON.parse(event.data);
+        const unfiltered = Object.keys(currentFilters).length === 0;
+
+        // Totals describe the whole collection, so they only apply to the unfiltered view
+        if (data.counters && unfiltered) {
+            paginationData = {
+                ...paginationData,
+                ...data.counters,
+                total_pages: Math.max(1, Math.ceil(data.counters.total_predictions / pageSize))
+            };
+            displayStats(paginationData);
+            updatePaginationControls(paginationData);
+        }
+
+        // New rows belong at the top of the first page
+        if (currentPage === 1 && unfiltered && data.rows.length > 0) {
+            paginationData.predictions = [...data.rows.reverse(), ...(paginationData.predictions || [])].slice(0, pageSize);
+            displayPatients(paginationData.predictions);
+            document.getElementById('patientsTable').style.display = 'block';
+            document.getElementById('noDataMessage').style.display = 'none';
+        }
+    });
+
+    // Sent when the events since our last one are no longer buffered
+    liveFeed.addEventListener('reset', function (event) {
+        lastLiveEventId = event.lastEventId || lastLiveEventId;
+        loadPatientData(currentPage);
+    });
+}
+
 function displayStats(data) {
     const statsContainer = document.getElementById('statsContainer');
 
@@ -402,32 +467,36 @@ function closePatientModal() {
     }
 }
 
+/**
+ * Turn the search box into a server-side filter: a risk level, an email
+ * prefix (anything with '@') or a name prefix. Searches the whole collection.
+ */
+function searchFilters(term) {
+    if (term === '') return {};
+
+    const riskLevels = { high: 'High', moderate: 'Moderate', low: 'Low' };
+    if (riskLevels[term.toLowerCase()]) {
+        return { risk_level: riskLevels[term.toLowerCase()] };
+    }
+    if (term.includes('@')) {
+        return { email: term };
+    }
+    return { name: term };
+}
+
 function setupSearch() {
     const searchInput = document.getElementById('searchInput');
     if (searchInput) {
-        // Search works on current page only.
+        let searchTimer = null;
         searchInput.addEventListener('input', function () {
-            const searchTerm = this.value.toLowerCase().trim();
-            const currentPredictions = paginationData.predictions || [];
-
-            if (searchTerm === '') {
-                displayPatients(currentPredictions);
-                return;
-            }
-
-            const filtered = currentPredictions.filter(pred => {
-                const name = (pred.user_name || '').toLowerCase();
-                const email = (pred.user_email || '').toLowerCase();
-                const riskLevel = (pred.prediction?.risk_level || '').toLowerCase();
-
-                return (
-                    name.includes(searchTerm) ||
-                    email.includes(searchTerm) ||
-                    riskLevel.includes(searchTerm)
-                );
-            });
-
-            displayPatients(filtered);
+            const searchTerm = this.value.trim();
+
+            // Wait for a pause in typing before asking the server
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {
+                currentFilters = searchFilters(searchTerm);
+                loadPatientData(1);
+            }, 300);
         });
     }
 }
@@ -1,7 +1,11 @@
+// next_cursor of the last history page loaded
+let historyCursor = null;
+
 document.addEventListener('DOMContentLoaded', function() {
     checkAuthentication();
     initializePredictionForm();
     setupLogout();
+    setupHistory();
 });
 
 function checkAuthentication() {
@@ -210,6 +214,7 @@ async function handlePrediction(e) {
         if (response.success && response.data.success) {
             displayPredictionResult(response.data);
             document.getElementById('predictionResult').scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+            loadHistory();
         } else {
             const errorMsg = response.error || (response.data?.detail || response.data?.message || 'An error occurred during prediction');
             showNotification(errorMsg, 'error');
@@ -279,3 +284,76 @@ function displayPredictionResult(result) {
     resultDiv.style.display = 'block';
 }
 
+function setupHistory() {
+    const moreBtn = document.getElementById('historyMoreBtn');
+    if (moreBtn) {
+        moreBtn.addEventListener('click', function () {
+            loadHistory(historyCursor);
+        });
+    }
+    loadHistory();
+}
+
+/**
+ * Load one page of the patient's past predictions. The first page
+ * (no cursor) replaces the list and comes with the trend summary.
+ */
+async function loadHistory(cursor = null) {
+    const historyDiv = document.getElementById('predictionHistory');
+    if (!historyDiv || !isAuthenticated()) return;
+
+    const params = new URLSearchParams({ page_size: 10 });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await apiCall(`${getApiUrl(API_CONFIG.ENDPOINTS.PREDICTION.HISTORY)}?${params}`);
+    if (!response.success || !response.data.success) return;
+
+    const data = response.data;
+    historyCursor = data.next_cursor;
+
+    if (!cursor) {
+        if (data.predictions.length === 0) {
+            historyDiv.style.display = 'none';
+            return;
+        }
+        document.getElementById('historyTrend').innerHTML = renderHistoryTrend(data.trend);
+        document.getElementById('historyList').innerHTML = '';
+    }
+
+    document.getElementById('historyList').insertAdjacentHTML('beforeend', data.predictions.map(renderHistoryItem).join(''));
+    document.getElementById('historyMoreBtn').style.display = historyCursor ? 'inline-block' : 'none';
+    historyDiv.style.display = 'block';
+}
+
+function renderHistoryTrend(trend) {
+    if (!trend) return '';
+    const percent = value => `${(value * 100).toFixed(1)}%`;
+    const stats = [
+        ['Latest', percent(trend.latest)],
+        [`Last ${Math.min(trend.window, trend.count)} average`, percent(trend.moving_average)],
+        ['Lowest', percent(trend.min)],
+        ['Highest', percent(trend.max)]
+    ];
+    return `
+        <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; margin-bottom: 1.5rem;">
+            ${stats.map(([label, value]) => `
+                <div style="background: white; padding: 1rem; border-radius: 0.5rem; border: 1px solid #e2e8f0;">
+                    <div style="font-size: 0.875rem; color: #64748b; margin-bottom: 0.5rem;">${label}</div>
+                    <div style="font-size: 1.25rem; font-weight: 600; color: #1e293b;">${value}</div>
+                </div>
+            `).join('')}
+        </div>
+    `;
+}
+
+function renderHistoryItem(item) {
+    const colors = { Low: '#10b981', Moderate: '#f59e0b', High: '#ef4444' };
+    const date = new Date(item.created_at);
+    return `
+        <div style="display: flex; justify-content: space-between; padding: 0.75rem 1rem; background: white; border-bottom: 1px solid #e2e8f0;">
+            <span style="color: #64748b;">${date.toLocaleDateString()} ${date.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}</span>
+            <span style="color: ${colors[item.risk_level] || '#64748b'}; font-weight: 600;">${item.risk_level}</span>
+            <span style="color: #1e293b; font-weight: 600;">${(item.probability * 100).toFixed(2)}%</span>
+        </div>
+    `;
+}